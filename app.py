@@ -5,61 +5,18 @@ import numpy as np
 import pickle
 import datetime
 import os
-from scipy.stats.mstats import winsorize # Pastikan scipy ada di requirements.txt
-
-# ===================================================================================
-# Definisi Fungsi Pra-pemrosesan (Sama seperti di Notebook Colab)
-# ===================================================================================
-def winsorize_series_robust(df_or_series, column_name=None, limits=(0.01, 0.01)):
-    if isinstance(df_or_series, pd.DataFrame):
-        if column_name is None or column_name not in df_or_series.columns:
-            # Jika kolom tidak ada, kembalikan DataFrame asli tanpa error
-            # print(f"Peringatan: Kolom '{column_name}' untuk winsorizing tidak ditemukan di DataFrame.")
-            return df_or_series
-        series_to_winsorize = df_or_series[column_name].copy()
-    elif isinstance(df_or_series, pd.Series):
-        series_to_winsorize = df_or_series.copy()
-        column_name = df_or_series.name # Ambil nama kolom dari series
-    else:
-        raise ValueError("Input harus DataFrame atau Series Pandas.")
-    
-    winsorized_array = winsorize(series_to_winsorize, limits=limits)
-    
-    if isinstance(df_or_series, pd.DataFrame):
-        df_out = df_or_series.copy()
-        df_out[column_name] = winsorized_array
-        return df_out
-    else:
-        return pd.Series(winsorized_array, name=column_name, index=df_or_series.index)
-
-def preprocess_initial_features(input_df):
-    df = input_df.copy()
-    if 'datetime' in df.columns:
-        df['hour_val'] = df['datetime'].dt.hour
-        df['month_val'] = df['datetime'].dt.month
-        df['weekday_val'] = df['datetime'].dt.weekday # Senin=0, Minggu=6
-        df['day'] = df['datetime'].dt.day
-        df['year_cat'] = df['datetime'].dt.year.astype(str) 
-        df['dayofyear'] = df['datetime'].dt.dayofyear
-        # Kolom 'datetime' asli akan di-drop nanti setelah semua fitur turunan dibuat,
-        # sebelum dimasukkan ke ColumnTransformer jika CT tidak mengharapkannya.
-    if 'atemp' in df.columns:
-        df = df.drop('atemp', axis=1, errors='ignore')
-    # Kolom 'casual' dan 'registered' tidak ada di input dari Streamlit
-    return df
-
-def create_cyclical_features(input_df):
-    df = input_df.copy()
-    if 'hour_val' in df.columns:
-        df['hour_sin'] = np.sin(2 * np.pi * df['hour_val']/24.0)
-        df['hour_cos'] = np.cos(2 * np.pi * df['hour_val']/24.0)
-    if 'month_val' in df.columns:
-        df['month_sin'] = np.sin(2 * np.pi * df['month_val']/12.0)
-        df['month_cos'] = np.cos(2 * np.pi * df['month_val']/12.0)
-    if 'weekday_val' in df.columns:
-        df['weekday_sin'] = np.sin(2 * np.pi * df['weekday_val']/7.0)
-        df['weekday_cos'] = np.cos(2 * np.pi * df['weekday_val']/7.0)
-    return df
+import time
+from preprocessing import RAW_INPUT_COLS
+from batch_scoring import score_frame, frame_to_bytes, DEFAULT_CHUNK_SIZE, PREDICTION_COLUMN
+from data_io import read_input_table
+from inference import build_raw_input_frame, log_to_counts, demand_level, predict_log
+from model_bundle import MODEL_BUNDLE_DIR
+from model_loader import start_pipeline_preload
+from model_registry import ModelRegistry, registry_settings_from_env
+from demand_profile import SCENARIO_COLUMN, build_profile_grid, predict_profile, profile_to_wide
+from prediction_cache import PredictionCache, configured_max_size, normalize_prediction_inputs
+from explanations import BIAS_COLUMN, PREDICTION_LOG_COLUMN, can_explain, explain_rows
+from stage_metrics import REGISTRY, is_enabled as stage_metrics_enabled, start_metrics_server
 
 # ===================================================================================
 # Konfigurasi Halaman Streamlit
@@ -79,34 +36,75 @@ st.set_page_config(
 # ===================================================================================
 # Muat Model
 # ===================================================================================
-@st.cache_resource
-def load_pickled_model(model_path):
-    """Memuat model dari file pickle."""
-    if not os.path.exists(model_path):
+def show_model_load_error(model_path, error):
+    """Menampilkan pesan kesalahan pemuatan model (exception dilempar dari thread pemuat latar belakang)."""
+    if isinstance(error, FileNotFoundError):
         st.error(f"File model '{model_path}' tidak ditemukan di path yang diharapkan. Pastikan file ada di direktori yang sama dengan aplikasi.")
+    elif isinstance(error, pickle.UnpicklingError):
+        st.error(f"Terjadi kesalahan saat unpickling model: {error}. File model mungkin rusak atau tidak kompatibel.")
+    elif isinstance(error, ModuleNotFoundError):
+        st.error(f"Terjadi kesalahan saat memuat model (ModuleNotFoundError): {error}. Pastikan semua library yang dibutuhkan model ada di requirements.txt.")
+        st.error("Jika Anda baru saja menghapus PyCaret dari requirements, pastikan model .pkl Anda tidak lagi memiliki dependensi padanya.")
+    else:
+        st.error(f"Terjadi kesalahan umum saat memuat model: {error}")
+
+MODEL_FILENAME = 'XGBoost_SKLearn_Pipeline_Final.pkl' # Sesuai nama file dari notebook
+
+@st.cache_resource
+def get_model_handles(model_path, bundle_dir):
+    """
+    Memulai pemuatan model di thread latar belakang, sekali per proses (lihat model_loader.py).
+
+    Handle pertama: registri versi model (model_registry.py) untuk halaman prediksi; artefak yang
+    diganti dimuat di latar belakang dan dipakai tanpa restart aplikasi. Handle kedua: pipeline
+    scikit-learn lengkap untuk halaman Info Model; hanya versi saat aplikasi dimulai, tidak ikut hot-reload.
+    """
+    model_registry = ModelRegistry(model_path, bundle_dir, **registry_settings_from_env()).start()
+    return model_registry, start_pipeline_preload(model_path, after=model_registry.initial_load)
+
+model_registry, pipeline_handle = get_model_handles(MODEL_FILENAME, MODEL_BUNDLE_DIR)
+
+@st.cache_resource
+def get_prediction_cache():
+    """Cache prediksi LRU bersama untuk semua sesi (ukuran maks: env PREDICTION_CACHE_MAX_SIZE)."""
+    return PredictionCache(max_size=configured_max_size())
+
+@st.cache_resource
+def get_explanation_cache():
+    """Cache kontribusi fitur per baris input, bersama untuk semua sesi (ukuran sama dengan cache prediksi)."""
+    return PredictionCache(max_size=configured_max_size())
+
+def explain_with_cache(model_version, input_df_raw):
+    """Kontribusi fitur (dan prediksi_log) untuk satu versi model; baris yang pernah dijelaskan diambil dari cache."""
+    return explain_rows(model_version.predictor, input_df_raw, cache=get_explanation_cache(), version=model_version.fingerprint)
+
+@st.cache_resource
+def get_metrics_server():
+    """Endpoint /metrics lokal (format Prometheus) jika env METRICS_PORT di-set; sekali per proses."""
+    port = os.environ.get('METRICS_PORT')
+    if not port:
         return None
     try:
-        with open(model_path, 'rb') as file:
-            model = pickle.load(file)
-        print(f"Model berhasil dimuat dari: {model_path}")
-        return model
-    except FileNotFoundError: # Seharusnya sudah ditangani oleh os.path.exists
-        st.error(f"File model '{model_path}' tidak ditemukan. Pastikan file ada di direktori yang sama dengan aplikasi.")
-        return None
-    except pickle.UnpicklingError as e:
-        st.error(f"Terjadi kesalahan saat unpickling model: {e}. File model mungkin rusak atau tidak kompatibel.")
-        return None
-    except ModuleNotFoundError as e:
-        st.error(f"Terjadi kesalahan saat memuat model (ModuleNotFoundError): {e}. Pastikan semua library yang dibutuhkan model ada di requirements.txt.")
-        st.error("Jika Anda baru saja menghapus PyCaret dari requirements, pastikan model .pkl Anda tidak lagi memiliki dependensi padanya.")
+        return start_metrics_server(int(port))
+    except (OSError, ValueError) as e: # Port terpakai/tidak valid: aplikasi tetap berjalan tanpa endpoint
+        print(f"Gagal menjalankan endpoint metrics di port {port}: {e}")
         return None
+
+get_metrics_server()
+
+def wait_for_model(handle, spinner_text="Menyiapkan model prediksi..."):
+    """Menunggu handle siap (dengan spinner jika belum); mengembalikan None dan menampilkan error jika gagal."""
+    try:
+        if handle.is_ready():
+            return handle.wait()
+        with st.spinner(spinner_text):
+            return handle.wait()
     except Exception as e:
-        st.error(f"Terjadi kesalahan umum saat memuat model: {e}")
+        st.error("MODEL PREDIKSI GAGAL DIMUAT. Halaman ini tidak dapat ditampilkan.")
+        show_model_load_error(MODEL_FILENAME, e)
+        st.markdown("Silakan periksa file model dan log, atau hubungi administrator.")
         return None
 
-MODEL_FILENAME = 'XGBoost_SKLearn_Pipeline_Final.pkl' # Sesuai nama file dari notebook
-pipeline_model = load_pickled_model(MODEL_FILENAME)
-
 # ===================================================================================
 # HTML Templates (Tidak ada perubahan)
 # ===================================================================================
@@ -124,16 +122,14 @@ def main():
     menu_options = {
         "🏠 Beranda": show_homepage,
         "⚙️ Aplikasi Prediksi": run_prediction_app,
+        "📦 Prediksi Batch": run_batch_prediction_page,
         "📖 Info Model": show_model_info_page
     }
     st.sidebar.title("Navigasi Aplikasi")
     choice = st.sidebar.radio("", list(menu_options.keys()), label_visibility="collapsed")
 
-    if pipeline_model is None and choice == "⚙️ Aplikasi Prediksi":
-        st.error("MODEL PREDIKSI GAGAL DIMUAT. Halaman prediksi tidak dapat ditampilkan.")
-        st.markdown("Silakan periksa file model dan log, atau hubungi administrator.")
-    else:
-        menu_options[choice]()
+    # Halaman yang butuh model menunggu handle pemuatan sendiri (wait_for_model); Beranda tidak menunggu
+    menu_options[choice]()
     
     stc.html(HTML_FOOTER, height=70)
 
@@ -179,8 +175,15 @@ def show_homepage():
 def run_prediction_app():
     st.markdown("## ⚙️ Masukkan Parameter untuk Prediksi")
     
-    if pipeline_model is None:
-        # Pesan error sudah ditangani di fungsi main atau saat load_pickled_model
+    fast_predictor = wait_for_model(model_registry)
+    if fast_predictor is None:
+        # Pesan error sudah ditampilkan oleh wait_for_model
+        return
+
+    prediction_mode = st.radio("Mode Prediksi", ("🕐 Satu Jam", "📈 Profil Permintaan (Hari/Minggu)"),
+                               horizontal=True, key="prediction_mode_radio")
+    if prediction_mode != "🕐 Satu Jam":
+        run_demand_profile_form(fast_predictor)
         return
 
     st.markdown("#### 📅 Informasi Waktu")
@@ -239,106 +242,203 @@ def run_prediction_app():
         windspeed = st.number_input("Kecepatan Angin (km/jam)", min_value=0.0, max_value=80.0, value=10.0, step=0.1, format="%.1f", key="windspeed_input")
 
     st.markdown("---")
+    explain_prediction = st.checkbox("Jelaskan prediksi (kontribusi fitur, ±10 ms)", key="explain_prediction_checkbox")
     
     if st.button("Prediksi Jumlah Sewa Sekarang!", use_container_width=True, type="primary", key="predict_button_main"):
-        # 1. Buat DataFrame awal dari input pengguna
-        input_data_dict = {
-            'datetime': [dt_object], 
-            'season': [season], 
-            'holiday': [holiday],
-            'workingday': [workingday], 
-            'weather': [weather], 
-            'temp': [temp],
-            'humidity': [humidity], 
-            'windspeed': [windspeed],
-            'atemp': [temp] # Tambahkan atemp, nanti akan di-drop oleh preprocess_initial_features
-        }
-        input_df_raw = pd.DataFrame(input_data_dict)
-
-        # 2. Terapkan pra-pemrosesan dan rekayasa fitur seperti di notebook
-        #    Ini akan membuat kolom seperti 'hour_val', 'month_val', 'year_cat', 'hour_sin', 'windspeed' (mungkin sudah di-winsorize), dll.
-        #    dan menghapus 'datetime' asli serta 'atemp'.
+        # 1. Buat DataFrame awal dari input pengguna (skema sama dengan layanan HTTP, lihat inference.py)
+        input_df_raw = build_raw_input_frame({
+            'datetime': dt_object,
+            'season': season,
+            'holiday': holiday,
+            'workingday': workingday,
+            'weather': weather,
+            'temp': temp,
+            'humidity': humidity,
+            'windspeed': windspeed,
+        })
+
+        # 2. Rekayasa fitur + predict dalam satu lintasan (lihat inference.predict_log dan preprocessing.featurize_columns)
+        #    Input yang sama (dari sesi mana pun) diambil dari cache prediksi bersama.
         try:
-            df_p1 = preprocess_initial_features(input_df_raw.copy())
-            df_p2 = create_cyclical_features(df_p1)
-            
-            # Terapkan winsorizing manual, pastikan kolom ada
-            input_df_engineered = df_p2.copy()
-            if 'humidity' in input_df_engineered.columns:
-                input_df_engineered = winsorize_series_robust(input_df_engineered, column_name='humidity', limits=(0.01, 0.01))
-            if 'windspeed' in input_df_engineered.columns:
-                input_df_engineered = winsorize_series_robust(input_df_engineered, column_name='windspeed', limits=(0.05, 0.05))
-
-            # 3. Drop kolom 'datetime' jika masih ada, karena pipeline dilatih tanpa itu sebagai input langsung ke CT
-            if 'datetime' in input_df_engineered.columns:
-                input_df_engineered = input_df_engineered.drop('datetime', axis=1)
-
-            # 4. Pastikan urutan kolom dan nama kolom sesuai dengan yang diharapkan pipeline
-            #    (saat X_train_engineered dimasukkan ke .fit() di notebook)
-            #    ColumnTransformer di dalam pipeline akan memilih kolom berdasarkan nama.
-            
-            # Ambil daftar kolom yang diharapkan dari fitur yang digunakan untuk melatih pipeline di notebook
-            # Ini harus sama dengan X_train_engineered.columns.tolist() di notebook SEBELUM .fit() pipeline
-            # Urutan mungkin penting jika ada langkah selain ColumnTransformer di awal pipeline Anda.
-            # Untuk ColumnTransformer, yang penting nama kolomnya ada.
-            
-            # Kolom yang diharapkan oleh ColumnTransformer (preprocessor_ct) di pipeline Anda:
-            # (Ini harus diambil dari definisi `numeric_features_for_scaling` dan 
-            # `categorical_features_for_ohe` di notebook Anda setelah semua rekayasa fitur manual)
-            expected_cols_for_ct = [
-                'temp', 'humidity', 'windspeed', 'day', 'dayofyear',
-                'hour_sin', 'hour_cos', 'month_sin', 'month_cos', 
-                'weekday_sin', 'weekday_cos', 'season', 'holiday', 
-                'workingday', 'weather', 'hour_val', 'month_val', 
-                'weekday_val', 'year_cat'
-            ]
-            
-            # Pastikan semua kolom yang diharapkan ada, jika tidak, bisa menyebabkan error saat predict
-            # Atau, jika pipeline Anda cukup robust (misal, ColumnTransformer dengan remainder='drop'),
-            # ia mungkin hanya akan menggunakan kolom yang ditemukannya.
-            # Untuk keamanan, kita bisa membuat DataFrame final dengan kolom yang diharapkan saja.
-            
-            missing_cols = set(expected_cols_for_ct) - set(input_df_engineered.columns)
-            if missing_cols:
-                st.error(f"Rekayasa fitur di app.py tidak menghasilkan semua kolom yang diharapkan. Kolom yang hilang: {missing_cols}")
-                st.dataframe(input_df_engineered) # Tampilkan untuk debug
-                return
-
-            # Pilih hanya kolom yang diharapkan oleh ColumnTransformer (jika CT Anda strict)
-            # input_features_for_pipeline = input_df_engineered[expected_cols_for_ct]
-            # Jika ColumnTransformer Anda menggunakan `remainder='drop'`, ia akan menangani kolom ekstra.
-            # Yang penting adalah kolom yang akan ditransformasi oleh CT ada.
-            input_features_for_pipeline = input_df_engineered 
+            cache_key = normalize_prediction_inputs(dt_object, season, holiday, workingday, weather, temp, humidity, windspeed)
 
             st.markdown("#### Hasil Prediksi")
-            prediction_log = pipeline_model.predict(input_features_for_pipeline)
-            predicted_count_original = np.expm1(prediction_log[0])
-            predicted_count_final = max(0, int(round(predicted_count_original)))
+            # Kunci versi = versi model aktif, sehingga cache juga dikosongkan saat rollback/promosi
+            live_version = model_registry.live
+            prediction_log = get_prediction_cache().get_or_compute(cache_key, lambda: float(predict_log(live_version.predictor, input_df_raw)[0]),
+                                                                   version=live_version.fingerprint)
+            # Penjelasan hanya untuk grafik: jumlah kontribusinya bisa membulatkan ke angka prediksi yang berbeda
+            explanation_df = None
+            if explain_prediction and can_explain(live_version.predictor):
+                explanation_df, _ = explain_with_cache(live_version, input_df_raw)
+            predicted_count_final = int(log_to_counts(prediction_log))
+            # Kandidat bayangan (jika ada) menilai setiap permintaan, termasuk yang dilayani dari cache
+            model_registry.shadow_score(input_df_raw, np.array([predicted_count_final]))
             
             st.metric(label="Estimasi Jumlah Sewa Sepeda", value=f"{predicted_count_final} unit")
 
-            if predicted_count_final < 50:
+            level = demand_level(predicted_count_final)
+            if level == 'rendah':
                 st.info("Saran: Permintaan diprediksi rendah.")
-            elif predicted_count_final < 250:
+            elif level == 'sedang':
                 st.success("Saran: Permintaan diprediksi sedang.")
             else:
                 st.warning("Saran: Permintaan diprediksi tinggi.")
 
+            if explanation_df is not None:
+                with st.expander("🔍 Mengapa prediksinya begini?", expanded=True):
+                    row_contribs = explanation_df.iloc[0]
+                    feature_contribs = row_contribs.drop([BIAS_COLUMN, PREDICTION_LOG_COLUMN])
+                    st.bar_chart(feature_contribs.reindex(feature_contribs.abs().sort_values(ascending=False).index).rename("kontribusi"),
+                                 horizontal=True)
+                    st.caption(f"Kontribusi tiap fitur pada skala log(1 + jumlah sewa). Nilai dasar model {row_contribs[BIAS_COLUMN]:.2f} "
+                               f"+ total kontribusi {feature_contribs.sum():+.2f} = {row_contribs[PREDICTION_LOG_COLUMN]:.2f}. "
+                               f"Positif menaikkan, negatif menurunkan prediksi.")
+            elif explain_prediction:
+                st.info("Kontribusi fitur tidak tersedia untuk model ini (butuh prediktor terkompilasi).")
+
         except KeyError as e:
             st.error(f"Gagal membuat prediksi (KeyError): Kolom '{e}' tidak ditemukan setelah rekayasa fitur.")
             st.error("Ini biasanya berarti ada ketidaksesuaian antara fitur yang dibuat di app.py dan yang diharapkan model.")
-            st.write("DataFrame setelah rekayasa fitur (sebelum prediksi):")
-            st.dataframe(input_df_engineered)
+            st.write("DataFrame input (sebelum rekayasa fitur):")
+            st.dataframe(input_df_raw)
         except Exception as e:
             st.error(f"Gagal membuat prediksi (Error Umum): {e}")
-            st.write("DataFrame setelah rekayasa fitur (sebelum prediksi):")
-            st.dataframe(input_df_engineered)
+            st.write("DataFrame input (sebelum rekayasa fitur):")
+            st.dataframe(input_df_raw)
             
+#====================================================================================#
+# Mode Profil Permintaan (24 / 168 jam dalam satu panggilan predict)
+#====================================================================================#
+def run_demand_profile_form(fast_predictor):
+    st.markdown("#### 📈 Profil Permintaan per Jam")
+    col_date, col_horizon = st.columns([1, 1])
+    with col_date:
+        start_date = st.date_input("Tanggal Mulai", datetime.date.today() + datetime.timedelta(days=1),
+                                   min_value=datetime.date.today(), key="profile_start_date")
+    with col_horizon:
+        horizon = st.radio("Horizon", ("day", "week"), horizontal=True, key="profile_horizon_radio",
+                           format_func=lambda x: "1 Hari (24 jam)" if x == "day" else "1 Minggu (168 jam)")
+
+    season_options = {1: "Musim Semi", 2: "Musim Panas", 3: "Musim Gugur", 4: "Musim Dingin"}
+    weather_options = {1: "Cerah/Sedikit Berawan", 2: "Kabut/Berawan Sebagian", 3: "Hujan/Salju Ringan", 4: "Cuaca Ekstrem"}
+    col_kondisi, col_lingkungan = st.columns([1, 1])
+    with col_kondisi:
+        season = st.selectbox("Musim", options=list(season_options.keys()),
+                              format_func=lambda x: f"{season_options[x]} (Kode: {x})", key="profile_season_select")
+        holiday = st.radio("Hari Libur Nasional?", (0, 1), format_func=lambda x: "Ya" if x == 1 else "Tidak",
+                           horizontal=True, key="profile_holiday_radio",
+                           help="Hari kerja ditentukan otomatis per hari (Senin-Jumat dan bukan hari libur).")
+        weather = st.selectbox("Kondisi Cuaca", options=list(weather_options.keys()),
+                               format_func=lambda x: f"{weather_options[x]} (Kode: {x})", key="profile_weather_select")
+    with col_lingkungan:
+        temp = st.number_input("Suhu (°C)", min_value=-20.0, max_value=50.0, value=25.0, step=0.5, format="%.1f", key="profile_temp_input")
+        humidity = st.slider("Kelembapan (%)", min_value=0, max_value=100, value=60, step=1, key="profile_humidity_slider")
+        windspeed = st.number_input("Kecepatan Angin (km/jam)", min_value=0.0, max_value=80.0, value=10.0, step=0.1, format="%.1f", key="profile_windspeed_input")
+
+    sweep_choice = st.radio("Bandingkan Skenario", ("Tanpa", "Kode Cuaca", "Suhu"), horizontal=True, key="profile_sweep_radio")
+    sweep_column, sweep_values = None, None
+    if sweep_choice == "Kode Cuaca":
+        sweep_column = 'weather'
+        sweep_values = st.multiselect("Kode Cuaca", options=list(weather_options.keys()), default=[1, 2, 3],
+                                      format_func=lambda x: f"{weather_options[x]} (Kode: {x})", key="profile_sweep_weather")
+    elif sweep_choice == "Suhu":
+        sweep_column = 'temp'
+        sweep_values = st.multiselect("Suhu (°C)", options=[float(t) for t in range(-5, 46, 5)], default=[10.0, 20.0, 30.0],
+                                      key="profile_sweep_temp")
+
+    explain_profile = st.checkbox("Sertakan kontribusi fitur per jam (±10 ms per jam baru)", key="profile_explain_checkbox")
+    if st.button("Buat Profil Permintaan", use_container_width=True, type="primary", key="predict_button_profile"):
+        try:
+            profile_grid = build_profile_grid(start_date, horizon, season, holiday, weather, temp, humidity, windspeed,
+                                              sweep_column=sweep_column, sweep_values=sweep_values)
+            live_version = model_registry.live
+            profile_df, elapsed = predict_profile(fast_predictor, profile_grid)
+            # Penjelasan hanya untuk grafik kontribusi; angka prediksi tetap dari predict
+            explained = explain_profile and can_explain(live_version.predictor)
+            if explained:
+                start = time.perf_counter()
+                explanation_df, n_computed = explain_with_cache(live_version, profile_grid)
+                explain_elapsed = time.perf_counter() - start
+        except Exception as e:
+            st.error(f"Gagal membuat profil permintaan: {e}")
+            return
+        model_registry.shadow_score(profile_grid, profile_df[PREDICTION_COLUMN].to_numpy())
+
+        st.line_chart(profile_to_wide(profile_df))
+        st.caption(f"{len(profile_df):,} baris diprediksi dalam satu panggilan predict ({elapsed * 1e3:.1f} ms).")
+        if explained:
+            st.caption(f"Kontribusi fitur: {n_computed:,} baris dihitung baru dalam satu lintasan booster, sisanya dari cache "
+                       f"({explain_elapsed * 1e3:.0f} ms).")
+        st.download_button("Unduh Profil (CSV)", data=frame_to_bytes(profile_df, 'csv'),
+                           file_name=f"profil_permintaan_{horizon}.csv", mime="text/csv",
+                           use_container_width=True, key="profile_download_button")
+        if explained:
+            show_profile_explanation(profile_grid, explanation_df)
+        elif explain_profile:
+            st.info("Kontribusi fitur tidak tersedia untuk model ini (butuh prediktor terkompilasi).")
+
+def show_profile_explanation(profile_grid, explanation_df):
+    """Grafik kontribusi fitur per jam untuk grid profil (hasil explain_with_cache)."""
+    st.markdown("#### 🔍 Kontribusi Fitur per Jam")
+    feature_contribs = explanation_df.drop(columns=[BIAS_COLUMN, PREDICTION_LOG_COLUMN]).set_index(profile_grid['datetime'])
+    if SCENARIO_COLUMN in profile_grid.columns: # Grafik per jam hanya untuk skenario pertama
+        first_scenario = profile_grid[SCENARIO_COLUMN].iloc[0]
+        feature_contribs = feature_contribs[(profile_grid[SCENARIO_COLUMN] == first_scenario).values]
+        st.caption(f"Grafik per jam untuk skenario {first_scenario}.")
+    top_features = feature_contribs.abs().mean().sort_values(ascending=False).index[:6]
+    st.line_chart(feature_contribs[top_features])
+    st.bar_chart(feature_contribs.abs().mean().sort_values(ascending=False).rename("rata-rata |kontribusi|"), horizontal=True)
+    st.caption("Skala log(1 + jumlah sewa).")
+
+#====================================================================================#
+# Halaman Prediksi Batch (Upload CSV/Parquet)
+#====================================================================================#
+def run_batch_prediction_page():
+    st.markdown("## 📦 Prediksi Batch dari File")
+    st.markdown(f"""
+    Unggah file **CSV** atau **Parquet** berisi data per jam untuk diprediksi sekaligus.
+    Kolom wajib: `{"`, `".join(RAW_INPUT_COLS)}`.
+    """)
+
+    fast_predictor = wait_for_model(model_registry)
+    if fast_predictor is None:
+        return
+
+    uploaded_file = st.file_uploader("File Input", type=["csv", "parquet"], key="batch_file_uploader")
+    chunk_size = st.number_input("Jumlah Baris per Potongan (Chunk)", min_value=1_000, max_value=1_000_000,
+                                 value=DEFAULT_CHUNK_SIZE, step=1_000, key="batch_chunk_size")
+
+    if uploaded_file is not None and st.button("Prediksi Semua Baris", use_container_width=True, type="primary", key="predict_button_batch"):
+        try:
+            input_df_raw = read_input_table(uploaded_file)
+            with st.spinner(f"Memproses {len(input_df_raw)} baris..."):
+                result_df, stats = score_frame(fast_predictor, input_df_raw, chunk_size=int(chunk_size))
+        except Exception as e:
+            st.error(f"Gagal membuat prediksi batch: {e}")
+            return
+        model_registry.shadow_score(input_df_raw, result_df[PREDICTION_COLUMN].to_numpy())
+
+        st.markdown("#### Hasil Prediksi Batch")
+        col_rows, col_speed = st.columns(2)
+        col_rows.metric("Jumlah Baris", f"{stats['rows']:,}")
+        col_speed.metric("Kecepatan", f"{stats['rows_per_sec']:,.0f} baris/detik")
+        st.dataframe(result_df.head(100))
+        st.download_button("Unduh Hasil (CSV)", data=frame_to_bytes(result_df, 'csv'),
+                           file_name="hasil_prediksi_batch.csv", mime="text/csv",
+                           use_container_width=True, key="batch_download_button")
+
 #====================================================================================#
 # Halaman Informasi Model (DENGAN PERBAIKAN TAMPILAN PIPELINE)
 #====================================================================================#
 def show_model_info_page():
     st.markdown("## 📖 Informasi Detail Model Prediksi")
+    # Pipeline lengkap (scikit-learn) dimuat di latar belakang setelah prediktor cepat; hanya halaman ini yang memakainya
+    pipeline_model = wait_for_model(pipeline_handle, "Memuat detail pipeline...")
+    live, initial = model_registry.live, model_registry.initial_version
+    if live is not None and initial is not None and live is not initial:
+        st.info(f"Detail pipeline di halaman ini berasal dari versi saat aplikasi dimulai ({initial.label}), "
+                f"bukan versi aktif saat ini ({live.label}). Muat ulang aplikasi untuk melihat detail versi aktif.")
     st.markdown(f"""
     Model prediktif yang menjadi tulang punggung aplikasi ini adalah **XGBoost Regressor** yang dipaketkan dalam pipeline Scikit-learn.
     Pipeline ini dikembangkan dengan inspirasi dari alur kerja PyCaret, namun untuk deployment, pipeline finalnya disimpan dan digunakan secara mandiri dengan Scikit-learn untuk dependensi yang lebih ramping.
@@ -418,13 +518,87 @@ def show_model_info_page():
     else:
         st.warning("Objek pipeline model tidak tersedia.")
     
+    st.markdown("#### Statistik Cache Prediksi (Bersama untuk Semua Sesi):")
+    cache_stats = get_prediction_cache().stats()
+    col_hits, col_misses, col_evictions = st.columns(3)
+    col_hits.metric("Hit", f"{cache_stats['hits']:,}", help=f"Rasio hit: {cache_stats['hit_rate']:.1%}")
+    col_misses.metric("Miss", f"{cache_stats['misses']:,}")
+    col_evictions.metric("Eviksi (LRU)", f"{cache_stats['evictions']:,}")
+    st.caption(f"Isi cache: {cache_stats['size']:,} / {cache_stats['max_size']:,} entri · "
+               f"Invalidasi karena artefak model berubah: {cache_stats['invalidations']:,}")
+
+    show_model_versions()
+
+    if st.checkbox("Tampilkan diagnostik latensi per tahap", key="show_stage_metrics"):
+        if not stage_metrics_enabled():
+            st.warning("Instrumentasi latensi dimatikan (STAGE_METRICS=0).")
+        else:
+            stage_rows = REGISTRY.summary()
+            if stage_rows:
+                st.dataframe(pd.DataFrame(stage_rows).set_index('tahap').round(3), use_container_width=True)
+                st.caption("p50/p95 diperkirakan dari bucket histogram; akumulasi sejak proses dimulai, bersama untuk semua sesi.")
+            else:
+                st.write("Belum ada pengukuran. Jalankan prediksi terlebih dahulu.")
+
     st.info("Untuk detail teknis lebih lanjut mengenai proses pelatihan dan validasi, silakan merujuk pada dokumentasi pengembangan internal Tim COGNIDATA.")
 
+def show_model_versions():
+    """Versi model di registri: versi aktif, rollback/aktivasi dari LRU, dan kandidat bayangan."""
+    st.markdown("#### Versi Model (Hot-Reload):")
+    live = model_registry.live
+    if live is None:
+        st.write("Model belum dimuat.")
+        return
+    st.write(f"Versi aktif: **{live.label}** · dimuat dalam {live.load_seconds:.1f} detik")
+    st.dataframe(pd.DataFrame([{
+        'versi': version.label,
+        'status': 'aktif' if version is live else ('kandidat' if version is model_registry.candidate else 'cadangan'),
+        'dimuat_pada': datetime.datetime.fromtimestamp(version.loaded_at).strftime('%Y-%m-%d %H:%M:%S'),
+        'durasi_muat_s': round(version.load_seconds, 2),
+    } for version in model_registry.versions()]), use_container_width=True, hide_index=True)
+    if model_registry.last_error:
+        st.warning(model_registry.last_error)
+
+    col_check, col_rollback = st.columns(2)
+    if col_check.button("Periksa Artefak Sekarang", key="registry_check_button", use_container_width=True):
+        try:
+            with st.spinner("Memeriksa dan memuat artefak model..."):
+                new_version = model_registry.check_for_update(require_stable=False)
+        except Exception as e:
+            st.error(f"Gagal memeriksa artefak model: {e}")
+        else:
+            if new_version is not None:
+                st.success(f"Versi {new_version.label} dimuat.")
+            else:
+                st.info("Tidak ada versi baru.")
+    if col_rollback.button("Rollback ke Versi Sebelumnya", key="registry_rollback_button", use_container_width=True):
+        previous = model_registry.rollback()
+        if previous is not None:
+            st.success(f"Versi aktif sekarang: {previous.label}")
+        else:
+            st.info("Tidak ada versi sebelumnya di registri.")
+
+    candidate = model_registry.candidate
+    if candidate is not None:
+        shadow = model_registry.shadow_stats.snapshot()
+        st.markdown(f"**Kandidat bayangan: {candidate.label}**")
+        col_rows, col_mean, col_max = st.columns(3)
+        col_rows.metric("Baris Dibandingkan", f"{shadow['rows']:,}")
+        col_mean.metric("Rata-rata Selisih", f"{shadow['mean_abs_diff']:.1f} unit")
+        col_max.metric("Selisih Maksimum", f"{shadow['max_abs_diff']:.0f} unit")
+        if shadow['skipped'] or shadow['errors']:
+            st.caption(f"Dilewati (antrean penuh): {shadow['skipped']:,} · Gagal: {shadow['errors']:,}")
+        col_promote, col_discard = st.columns(2)
+        if col_promote.button("Promosikan Kandidat", key="registry_promote_button", use_container_width=True):
+            model_registry.promote_candidate()
+            st.success(f"Versi aktif sekarang: {candidate.label}")
+        if col_discard.button("Buang Kandidat", key="registry_discard_button", use_container_width=True):
+            model_registry.discard_candidate()
+    st.caption(f"Artefak diperiksa setiap {model_registry.poll_seconds:g} detik · maksimum {model_registry.max_versions} versi disimpan"
+               + (" · mode bayangan aktif" if model_registry.shadow else ""))
+
 #====================================================================================#
 # Menjalankan Aplikasi
 #====================================================================================#
 if __name__ == "__main__":
-    if pipeline_model is None:
-        # Pesan error sudah cukup jelas di atas saat load_pickled_model atau di main()
-        pass
     main()
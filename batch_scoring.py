@@ -0,0 +1,116 @@
+"""
+Mode prediksi batch: memberi skor ribuan baris data per jam sekaligus dari file CSV/Parquet.
+
+Dipakai oleh halaman "Prediksi Batch" di app.py dan juga bisa dijalankan tanpa UI:
+
+    python batch_scoring.py input.csv hasil.csv --chunk-size 50000
+
+Untuk file yang terlalu besar untuk satu proses, lihat parallel_scoring.py (multi-proses, per shard).
+"""
+import argparse
+import io
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+from compiled_predictor import CompiledPredictor, compile_or_fallback
+from data_io import detect_format, read_input_table, validate_raw_input
+from inference import engineer_features_for, predict_counts
+from model_loader import attach_winsorization_bounds
+from preprocessing import RAW_INPUT_COLS
+
+MODEL_FILENAME = 'XGBoost_SKLearn_Pipeline_Final.pkl'
+DEFAULT_CHUNK_SIZE = 50_000
+PREDICTION_COLUMN = 'prediksi_jumlah_sewa'
+
+# ===================================================================================
+# Muat Model (tanpa Streamlit)
+# ===================================================================================
+def load_pipeline(model_path=MODEL_FILENAME):
+    """Memuat pipeline dari file pickle untuk pemakaian di luar Streamlit."""
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"File model '{model_path}' tidak ditemukan.")
+    with open(model_path, 'rb') as file:
+        return pickle.load(file)
+
+def to_lean_predictor(pipeline_model):
+    """Mode hemat memori bila model berupa CompiledPredictor; pipeline asli dikembalikan apa adanya."""
+    if isinstance(pipeline_model, CompiledPredictor):
+        return pipeline_model.lean()
+    print("Mode hemat memori butuh prediktor terkompilasi; memakai pipeline asli.")
+    return pipeline_model
+
+# ===================================================================================
+# Skoring Batch
+# ===================================================================================
+def score_frame(pipeline_model, input_df_raw, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Memberi skor seluruh DataFrame mentah dalam potongan (chunk) besar yang diproses secara vektor.
+
+    Mengembalikan (DataFrame hasil, dict statistik) di mana DataFrame hasil berisi kolom input
+    ditambah kolom `prediksi_jumlah_sewa`.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size harus lebih besar dari 0.")
+    input_df_raw = validate_raw_input(input_df_raw)
+
+    start = time.perf_counter()
+    n_rows = len(input_df_raw)
+    predictions = np.empty(n_rows, dtype=np.int64)
+    for chunk_start in range(0, n_rows, chunk_size):
+        chunk = input_df_raw.iloc[chunk_start:chunk_start + chunk_size]
+        predictions[chunk_start:chunk_start + len(chunk)] = predict_counts(pipeline_model, engineer_features_for(pipeline_model, chunk))
+    elapsed = time.perf_counter() - start
+
+    result_df = input_df_raw.copy()
+    result_df[PREDICTION_COLUMN] = predictions
+    stats = {
+        'rows': n_rows,
+        'seconds': elapsed,
+        'rows_per_sec': n_rows / elapsed if elapsed > 0 else float('inf'),
+    }
+    return result_df, stats
+
+def frame_to_bytes(result_df, file_format='csv'):
+    """Serialisasi hasil untuk diunduh (st.download_button) atau ditulis ke disk."""
+    buffer = io.BytesIO()
+    if file_format == 'parquet':
+        result_df.to_parquet(buffer, index=False)
+    else:
+        result_df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+# ===================================================================================
+# Entry Point CLI
+# ===================================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prediksi batch permintaan sewa sepeda dari file CSV/Parquet.")
+    parser.add_argument('input', help="File input (.csv atau .parquet) berisi kolom: " + ", ".join(RAW_INPUT_COLS))
+    parser.add_argument('output', help="File output (.csv atau .parquet)")
+    parser.add_argument('--model', default=MODEL_FILENAME, help="Path file model pickle")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Jumlah baris per potongan")
+    parser.add_argument('--no-compile', action='store_true', help="Pakai pipeline asli, bukan prediktor terkompilasi")
+    parser.add_argument('--lean', action='store_true', help="Mode hemat memori: fitur bertipe ringkas + matriks CSR")
+    args = parser.parse_args(argv)
+
+    pipeline_model = load_pipeline(args.model)
+    if not args.no_compile:
+        pipeline_model = compile_or_fallback(pipeline_model)
+    pipeline_model = attach_winsorization_bounds(pipeline_model, args.model)
+    if args.lean:
+        pipeline_model = to_lean_predictor(pipeline_model)
+    input_df_raw = read_input_table(args.input)
+    result_df, stats = score_frame(pipeline_model, input_df_raw, chunk_size=args.chunk_size)
+
+    with open(args.output, 'wb') as file:
+        file.write(frame_to_bytes(result_df, detect_format(args.output)))
+
+    print(f"{stats['rows']} baris diprediksi dalam {stats['seconds']:.2f} detik "
+          f"({stats['rows_per_sec']:,.0f} baris/detik). Hasil disimpan ke: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Benchmark offline (CPU) untuk pemuatan model, rekayasa fitur, dan prediksi pada berbagai ukuran batch.
+
+Setiap kasus dijalankan di proses Python baru (spawn) agar peak RSS terukur per kasus dan tidak
+saling memengaruhi. Data input sintetis dengan seed tetap (lihat synthetic_data.py).
+
+    python benchmark.py                                   # semua kasus, ukuran 1/100/10k/1M
+    python benchmark.py --sizes 1 100 --cases pipeline_predict
+    python benchmark.py --output hasil_baru.json --compare hasil_lama.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model_bundle import MODEL_BUNDLE_DIR, MODEL_FILENAME
+
+DEFAULT_SIZES = (1, 100, 10_000, 1_000_000)
+DEFAULT_OUTPUT = 'benchmark_results.json'
+SEED = 0
+# Artefak model di folder repo, terlepas dari direktori kerja saat benchmark dijalankan
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(REPO_DIR, MODEL_FILENAME)
+MODEL_BUNDLE_PATH = os.path.join(REPO_DIR, MODEL_BUNDLE_DIR)
+
+# ===================================================================================
+# Definisi Kasus
+# ===================================================================================
+# Setiap kasus: fungsi setup(n_rows) -> fungsi tanpa argumen yang diukur.
+# Kasus dengan size_independent=True (pemuatan model) hanya dijalankan sekali.
+def _setup_load_pickled_model(n_rows):
+    from batch_scoring import load_pipeline # Padanan tanpa Streamlit dari load_pickled_model di app.py
+    return lambda: load_pipeline(MODEL_PATH)
+
+def _setup_load_bundle(n_rows):
+    from model_bundle import load_bundle
+    return lambda: load_bundle(MODEL_BUNDLE_PATH).booster
+
+def _setup_preprocess_initial_features(n_rows):
+    from preprocessing import preprocess_initial_features
+    from synthetic_data import generate_synthetic_raw_frame
+    input_df_raw = generate_synthetic_raw_frame(n_rows, seed=SEED)
+    return lambda: preprocess_initial_features(input_df_raw)
+
+def _setup_create_cyclical_features(n_rows):
+    from preprocessing import create_cyclical_features, preprocess_initial_features
+    from synthetic_data import generate_synthetic_raw_frame
+    df_p1 = preprocess_initial_features(generate_synthetic_raw_frame(n_rows, seed=SEED))
+    return lambda: create_cyclical_features(df_p1)
+
+def _setup_winsorize_series_robust(n_rows):
+    from preprocessing import create_cyclical_features, preprocess_initial_features, winsorize_series_robust
+    from synthetic_data import generate_synthetic_raw_frame
+    df_p2 = create_cyclical_features(preprocess_initial_features(generate_synthetic_raw_frame(n_rows, seed=SEED)))
+    def run():
+        df = winsorize_series_robust(df_p2, column_name='humidity', limits=(0.01, 0.01))
+        return winsorize_series_robust(df, column_name='windspeed', limits=(0.05, 0.05))
+    return run
+
+def _setup_engineer_features(n_rows):
+    from preprocessing import engineer_features
+    from synthetic_data import generate_synthetic_raw_frame
+    input_df_raw = generate_synthetic_raw_frame(n_rows, seed=SEED)
+    return lambda: engineer_features(input_df_raw)
+
+def _setup_pipeline_predict(n_rows):
+    from batch_scoring import load_pipeline
+    from preprocessing import engineer_features
+    from synthetic_data import generate_synthetic_raw_frame
+    pipeline_model = load_pipeline(MODEL_PATH)
+    features = engineer_features(generate_synthetic_raw_frame(n_rows, seed=SEED))
+    return lambda: pipeline_model.predict(features)
+
+def _setup_end_to_end_pipeline(n_rows):
+    from batch_scoring import load_pipeline
+    from inference import log_to_counts, predict_log
+    from synthetic_data import generate_synthetic_raw_frame
+    pipeline_model = load_pipeline(MODEL_PATH)
+    input_df_raw = generate_synthetic_raw_frame(n_rows, seed=SEED)
+    return lambda: log_to_counts(predict_log(pipeline_model, input_df_raw))
+
+def _setup_end_to_end_compiled(n_rows):
+    from inference import log_to_counts, predict_log
+    from model_loader import load_predictor
+    from synthetic_data import generate_synthetic_raw_frame
+    predictor = load_predictor(MODEL_PATH, MODEL_BUNDLE_PATH)
+    input_df_raw = generate_synthetic_raw_frame(n_rows, seed=SEED)
+    return lambda: log_to_counts(predict_log(predictor, input_df_raw))
+
+def _setup_end_to_end_lean(n_rows):
+    from inference import log_to_counts, predict_log
+    from model_loader import load_predictor
+    from synthetic_data import generate_synthetic_raw_frame
+    predictor = load_predictor(MODEL_PATH, MODEL_BUNDLE_PATH).lean()
+    input_df_raw = generate_synthetic_raw_frame(n_rows, seed=SEED)
+    return lambda: log_to_counts(predict_log(predictor, input_df_raw))
+
+CASES = {
+    'load_pickled_model': (_setup_load_pickled_model, True),
+    'load_bundle': (_setup_load_bundle, True),
+    'preprocess_initial_features': (_setup_preprocess_initial_features, False),
+    'create_cyclical_features': (_setup_create_cyclical_features, False),
+    'winsorize_series_robust': (_setup_winsorize_series_robust, False),
+    'engineer_features': (_setup_engineer_features, False),
+    'pipeline_predict': (_setup_pipeline_predict, False),
+    'end_to_end_pipeline': (_setup_end_to_end_pipeline, False),
+    'end_to_end_compiled': (_setup_end_to_end_compiled, False),
+    'end_to_end_lean': (_setup_end_to_end_lean, False),
+}
+
+# ===================================================================================
+# Pengukuran
+# ===================================================================================
+def run_case(case_name, n_rows, min_time=1.0, min_repeats=3, max_repeats=1000):
+    """Menjalankan satu kasus (di proses saat ini) dan mengembalikan statistik latensi/throughput/peak RSS."""
+    import warnings
+    warnings.filterwarnings('ignore')
+    # Diimpor di sini, bukan di level modul: impor pandas tidak boleh ikut terukur pada panggilan pertama
+    from data_io import peak_rss_mb
+
+    setup, size_independent = CASES[case_name]
+    # Pesan status loader ("Bundel model berhasil dimuat ...") tidak boleh tercampur ke tabel hasil
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn = setup(n_rows)
+        # Panggilan pertama (dingin) dicatat terpisah: untuk pemuatan model termasuk biaya impor library
+        start = time.perf_counter()
+        fn()
+        first_call_ms = (time.perf_counter() - start) * 1e3
+        timings = []
+        started = time.perf_counter()
+        while len(timings) < max_repeats and (len(timings) < min_repeats or time.perf_counter() - started < min_time):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+            if size_independent and len(timings) >= min_repeats:
+                break
+    timings_ms = np.asarray(timings) * 1e3
+    p50 = float(np.percentile(timings_ms, 50))
+    return {
+        'case': case_name,
+        'rows': None if size_independent else n_rows,
+        'repeats': len(timings),
+        'first_call_ms': first_call_ms,
+        'p50_ms': p50,
+        'p90_ms': float(np.percentile(timings_ms, 90)),
+        'p99_ms': float(np.percentile(timings_ms, 99)),
+        'mean_ms': float(timings_ms.mean()),
+        'throughput_rows_per_s': None if size_independent else n_rows / (p50 / 1e3),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def run_case_isolated(case_name, n_rows, **kwargs):
+    """Menjalankan kasus di proses spawn baru agar peak RSS tidak tercampur antar kasus."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(run_case, case_name, n_rows, **kwargs).result()
+
+def environment_metadata():
+    versions = {}
+    for module_name in ('numpy', 'pandas', 'sklearn', 'xgboost', 'scipy'):
+        try:
+            versions[module_name] = __import__(module_name).__version__
+        except ImportError:
+            versions[module_name] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=REPO_DIR).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': SEED,
+        'versions': versions,
+    }
+
+def compare_results(new_results, old_results):
+    """Rasio p50 baru/lama per (kasus, ukuran); < 1 berarti lebih cepat."""
+    old_by_key = {(r['case'], r['rows']): r for r in old_results}
+    comparison = []
+    for r in new_results:
+        old = old_by_key.get((r['case'], r['rows']))
+        if old is not None and old['p50_ms'] > 0:
+            comparison.append({'case': r['case'], 'rows': r['rows'], 'old_p50_ms': old['p50_ms'],
+                               'new_p50_ms': r['p50_ms'], 'ratio': r['p50_ms'] / old['p50_ms']})
+    return comparison
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pemuatan model, rekayasa fitur, dan prediksi.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="Ukuran batch (baris)")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), help="Kasus yang dijalankan")
+    parser.add_argument('--min-time', type=float, default=1.0, help="Durasi minimum pengukuran per kasus (detik)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="File JSON hasil")
+    parser.add_argument('--compare', help="File JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument('--in-process', action='store_true', help="Jalankan di proses ini (lebih cepat, peak RSS kumulatif)")
+    args = parser.parse_args(argv)
+
+    runner = run_case if args.in_process else run_case_isolated
+    results = []
+    print(f"{'kasus':<28} {'baris':>9} {'pertama (ms)':>13} {'p50 (ms)':>11} {'p90 (ms)':>11} {'p99 (ms)':>11} {'baris/detik':>13} {'peak RSS (MB)':>14}")
+    for case_name in args.cases:
+        sizes = [None] if CASES[case_name][1] else args.sizes
+        for n_rows in sizes:
+            r = runner(case_name, n_rows, min_time=args.min_time)
+            results.append(r)
+            throughput = f"{r['throughput_rows_per_s']:,.0f}" if r['throughput_rows_per_s'] else '-'
+            peak = f"{r['peak_rss_mb']:.0f}" if r['peak_rss_mb'] is not None else '-'
+            print(f"{case_name:<28} {r['rows'] if r['rows'] is not None else '-':>9} {r['first_call_ms']:>13.1f} {r['p50_ms']:>11.3f} "
+                  f"{r['p90_ms']:>11.3f} {r['p99_ms']:>11.3f} {throughput:>13} {peak:>14}")
+
+    report = {'metadata': environment_metadata(), 'results': results}
+    if args.compare:
+        with open(args.compare) as file:
+            report['comparison'] = compare_results(results, json.load(file)['results'])
+        print(f"\nPerbandingan p50 dengan {args.compare} (rasio < 1 = lebih cepat):")
+        for c in report['comparison']:
+            print(f"{c['case']:<28} {c['rows'] if c['rows'] is not None else '-':>9} {c['old_p50_ms']:>11.3f} -> {c['new_p50_ms']:>11.3f} ({c['ratio']:.2f}x)")
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"\nHasil disimpan ke: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
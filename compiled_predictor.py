@@ -0,0 +1,397 @@
+"""
+Jalur cepat prediksi: "mengompilasi" pipeline hasil pickle menjadi prediktor NumPy datar.
+
+ColumnTransformer + StandardScaler + OneHotEncoder diganti dengan array mean/scale dan peta
+indeks kategori -> kolom one-hot yang dihitung sekali. Fitur ditulis langsung ke matriks float32
+yang dialokasikan ulang hanya jika perlu, lalu diberikan ke booster XGBoost via inplace_predict.
+
+Mode hemat memori (`CompiledPredictor.lean()`): fitur bertipe ringkas (int8/int16/float32) dan
+matriks CSR berisi nilai numerik + satu entri per kolom kategori, alih-alih matriks padat.
+
+Perbandingan latensi dengan pipeline asli (dan peak memori ketiga jalur):
+
+    python compiled_predictor.py --sizes 1 100 100000
+    python compiled_predictor.py --memory-rows 1000000
+"""
+import argparse
+import copy
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from stage_metrics import stage_timer
+
+# ===================================================================================
+# Kompilasi Pipeline
+# ===================================================================================
+def _compile_scaler(scaler, columns):
+    n_cols = len(columns)
+    mean = scaler.mean_ if getattr(scaler, 'with_mean', True) and scaler.mean_ is not None else np.zeros(n_cols)
+    scale = scaler.scale_ if getattr(scaler, 'with_std', True) and scaler.scale_ is not None else np.ones(n_cols)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+def _compile_one_hot(encoder, columns, first_output_col):
+    """
+    Untuk setiap kolom kategori, membuat peta kode kategori -> indeks kolom output.
+
+    Kategori bilangan bulat memakai tabel langsung nilai -> kolom (di luar rentang = tidak dikenal);
+    kategori lain (misal 'year_cat' berupa string) memakai pencarian hash via pd.Index.
+    Nilai -1 berarti tidak menulis apa pun: kategori yang di-drop atau tidak dikenal
+    (sama seperti handle_unknown='ignore').
+    """
+    if getattr(encoder, '_infrequent_enabled', False):
+        raise ValueError("OneHotEncoder dengan kategori 'infrequent' belum didukung oleh jalur cepat.")
+    drop_idx = getattr(encoder, 'drop_idx_', None)
+    compiled = []
+    output_col = first_output_col
+    for feature_idx, (column_name, categories) in enumerate(zip(columns, encoder.categories_)):
+        index_map = np.full(len(categories) + 1, -1, dtype=np.int64)
+        dropped = drop_idx[feature_idx] if drop_idx is not None else None
+        for category_code in range(len(categories)):
+            if dropped is not None and category_code == dropped:
+                continue
+            index_map[category_code] = output_col
+            output_col += 1
+        if np.issubdtype(categories.dtype, np.integer):
+            offset = int(categories.min())
+            value_map = np.full(int(categories.max()) - offset + 1, -1, dtype=np.int64)
+            value_map[categories.astype(np.int64) - offset] = index_map[:-1]
+            compiled.append((column_name, None, (offset, value_map)))
+        else:
+            compiled.append((column_name, pd.Index(categories), index_map))
+    return compiled, output_col
+
+def _lookup_output_cols(values, categories, index_map):
+    """Memetakan nilai kategori ke indeks kolom one-hot (-1 = tidak ditulis, -2 = tidak dikenal)."""
+    if categories is None:
+        offset, value_map = index_map
+        values = np.asarray(values)
+        if np.issubdtype(values.dtype, np.integer):
+            positions = values.astype(np.int64) - offset
+            in_range = (positions >= 0) & (positions < len(value_map))
+        else:
+            # Nilai pecahan/NaN (misal season 1.5) tidak dikenal, sama seperti OneHotEncoder; jangan dipotong ke int
+            float_values = values.astype(np.float64)
+            is_integral = np.isfinite(float_values) & (float_values == np.round(float_values))
+            positions = np.where(is_integral, float_values, offset).astype(np.int64) - offset
+            in_range = is_integral & (positions >= 0) & (positions < len(value_map))
+        return np.where(in_range, value_map[np.where(in_range, positions, 0)], -2)
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.integer) and categories.inferred_type == 'string':
+        # Kode integer (misal tahun int16 dari featurizer ringkas) untuk kategori string: cari per nilai unik
+        unique_values, inverse = np.unique(values, return_inverse=True)
+        codes = categories.get_indexer(unique_values.astype(str))[inverse.reshape(-1)]
+    else:
+        codes = categories.get_indexer(values)
+    return np.where(codes >= 0, index_map[codes], -2)
+
+def zero_default_booster(booster, first_sparse_feature):
+    """
+    Salinan booster di mana nilai hilang pada fitur >= `first_sparse_feature` diarahkan sama seperti nilai 0.
+
+    XGBoost memperlakukan entri yang tidak tersimpan di matriks CSR sebagai nilai hilang, bukan 0.
+    Kolom one-hot tidak pernah berisi nilai hilang pada jalur padat, sehingga arah default split-nya
+    tidak pernah dipakai; menyetelnya ke arah nilai 0 (kiri jika 0 < ambang) membuat prediksi dari
+    CSR tanpa nol eksplisit identik dengan prediksi dari matriks padat.
+    """
+    import xgboost as xgb
+    model = json.loads(booster.save_raw('json'))
+    gradient_booster = model['learner']['gradient_booster']
+    if gradient_booster.get('name') != 'gbtree':
+        raise ValueError(f"Mode hemat memori hanya mendukung booster gbtree, bukan '{gradient_booster.get('name')}'.")
+    for tree in gradient_booster['model']['trees']:
+        split_types = tree.get('split_type', [0] * len(tree['split_indices']))
+        tree['default_left'] = [
+            int(condition > 0) if left != -1 and feature >= first_sparse_feature and split_type == 0 else default_left
+            for feature, condition, default_left, left, split_type
+            in zip(tree['split_indices'], tree['split_conditions'], tree['default_left'], tree['left_children'], split_types)
+        ]
+    return xgb.Booster(model_file=bytearray(json.dumps(model).encode('utf-8')))
+
+class CompiledPredictor:
+    """Prediktor NumPy datar yang setara dengan `pipeline.predict` (keluaran tetap skala log)."""
+
+    def __init__(self, numeric_columns, mean, scale, one_hot_features, n_output_features,
+                 booster, iteration_range, missing, handle_unknown, booster_loader=None, winsorization_bounds=None):
+        self.numeric_columns = numeric_columns
+        self.mean = mean
+        self.scale = scale
+        self.one_hot_features = one_hot_features
+        self.n_output_features = n_output_features
+        self._booster = booster
+        # Jika booster None, booster_loader dipanggil sekali saat prediksi pertama (impor xgboost ditunda)
+        self._booster_loader = booster_loader
+        self._booster_lock = threading.Lock()
+        self.iteration_range = iteration_range
+        self.missing = missing
+        self.handle_unknown = handle_unknown
+        self._local = threading.local()
+        self.memory_lean = False
+        self._sparse_booster = None
+        # Batas winsorizing milik versi model ini; None = batas cadangan preprocessing.default_winsorization_bounds
+        self.winsorization_bounds = winsorization_bounds
+
+    @property
+    def booster(self):
+        if self._booster is None:
+            with self._booster_lock:
+                if self._booster is None:
+                    self._booster = self._booster_loader()
+        return self._booster
+
+    @property
+    def sparse_booster(self):
+        """Booster untuk input CSR (lihat zero_default_booster); dibuat sekali saat pertama dipakai."""
+        if self._sparse_booster is None:
+            booster = self.booster
+            with self._booster_lock:
+                if self._sparse_booster is None:
+                    self._sparse_booster = zero_default_booster(booster, len(self.numeric_columns))
+        return self._sparse_booster
+
+    def lean(self):
+        """Salinan prediktor dalam mode hemat memori (fitur ringkas + CSR); booster dibagi pakai."""
+        if self.memory_lean:
+            return self
+        lean_predictor = copy.copy(self)
+        lean_predictor.memory_lean = True
+        lean_predictor._local = threading.local()
+        if self._booster is None: # Pastikan kedua prediktor berbagi satu booster, bukan memuat dua kali
+            lean_predictor._booster = self.booster
+        return lean_predictor
+
+    def _buffer(self, n_rows):
+        """Matriks float32 per-thread yang dipakai ulang; hanya dialokasikan ulang jika kurang besar."""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape[0] < n_rows:
+            buffer = np.empty((n_rows, self.n_output_features), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer[:n_rows]
+
+    def transform(self, features):
+        """Menulis fitur (DataFrame/mapping berisi EXPECTED_COLS_FOR_CT) ke matriks float32 siap-booster."""
+        n_rows = len(features[self.numeric_columns[0]])
+        matrix = self._buffer(n_rows)
+        n_numeric = len(self.numeric_columns)
+        numeric = np.column_stack([np.asarray(features[c], dtype=np.float64) for c in self.numeric_columns])
+        matrix[:, :n_numeric] = (numeric - self.mean) / self.scale
+        matrix[:, n_numeric:] = 0.0
+        rows = np.arange(n_rows)
+        for column_name, categories, index_map in self.one_hot_features:
+            output_cols = _lookup_output_cols(features[column_name], categories, index_map)
+            if self.handle_unknown == 'error' and (output_cols == -2).any():
+                raise ValueError(f"Kategori tidak dikenal pada kolom '{column_name}'.")
+            written = output_cols >= 0
+            matrix[rows[written], output_cols[written]] = 1.0
+        return matrix
+
+    def transform_sparse(self, features):
+        """
+        Seperti transform, tetapi menghasilkan scipy CSR float32: semua kolom numerik (termasuk nol,
+        disimpan eksplisit) ditambah satu entri bernilai 1 per kolom kategori yang tidak di-drop.
+        """
+        from scipy import sparse
+        n_rows = len(features[self.numeric_columns[0]])
+        n_numeric = len(self.numeric_columns)
+        col_dtype = np.int16 if self.n_output_features < np.iinfo(np.int16).max else np.int32
+        output_cols = np.empty((n_rows, len(self.one_hot_features)), dtype=col_dtype)
+        for k, (column_name, categories, index_map) in enumerate(self.one_hot_features):
+            output_cols[:, k] = _lookup_output_cols(features[column_name], categories, index_map)
+            if self.handle_unknown == 'error' and (output_cols[:, k] == -2).any():
+                raise ValueError(f"Kategori tidak dikenal pada kolom '{column_name}'.")
+
+        row_nnz = n_numeric + (output_cols >= 0).sum(axis=1)
+        nnz = int(row_nnz.sum())
+        index_dtype = np.int32 if nnz < np.iinfo(np.int32).max else np.int64
+        indptr = np.zeros(n_rows + 1, dtype=index_dtype)
+        np.cumsum(row_nnz, out=indptr[1:])
+        del row_nnz
+        data = np.empty(nnz, dtype=np.float32)
+        indices = np.empty(nnz, dtype=index_dtype)
+        # Entri ditulis langsung ke posisi akhirnya, per kolom, tanpa matriks padat perantara
+        row_starts = indptr[:-1]
+        for j, column_name in enumerate(self.numeric_columns):
+            data[row_starts + j] = (np.asarray(features[column_name], dtype=np.float64) - self.mean[j]) / self.scale[j]
+            indices[row_starts + j] = j
+        positions = row_starts + n_numeric
+        for k in range(output_cols.shape[1]):
+            written = output_cols[:, k] >= 0
+            data[positions[written]] = 1.0
+            indices[positions[written]] = output_cols[written, k]
+            positions += written
+        return sparse.csr_matrix((data, indices, indptr), shape=(n_rows, self.n_output_features), copy=False)
+
+    def predict(self, features):
+        """Prediksi skala log, sama seperti `pipeline_model.predict(features)`."""
+        if self.memory_lean:
+            with stage_timer('column_transform'):
+                matrix = self.transform_sparse(features)
+            booster = self.sparse_booster
+            with stage_timer('booster'):
+                return booster.inplace_predict(matrix, iteration_range=self.iteration_range,
+                                               missing=self.missing, validate_features=False)
+        with stage_timer('column_transform'):
+            matrix = self.transform(features)
+        booster = self.booster # Pemuatan tertunda (bundel) tidak ikut terhitung sebagai waktu booster
+        with stage_timer('booster'):
+            return booster.inplace_predict(matrix, iteration_range=self.iteration_range,
+                                           missing=self.missing, validate_features=False)
+
+def compile_pipeline(pipeline_model):
+    """
+    Mengompilasi Pipeline([ColumnTransformer(StandardScaler, OneHotEncoder), XGBRegressor]).
+
+    Melempar ValueError jika struktur pipeline tidak didukung.
+    """
+    if not hasattr(pipeline_model, 'steps') or len(pipeline_model.steps) != 2:
+        raise ValueError("Jalur cepat hanya mendukung Pipeline dua langkah (ColumnTransformer, XGBRegressor).")
+    preprocessor = pipeline_model.steps[0][1]
+    regressor = pipeline_model.steps[-1][1]
+    if not hasattr(preprocessor, 'transformers_') or not hasattr(regressor, 'get_booster'):
+        raise ValueError("Langkah pipeline tidak dikenali: butuh ColumnTransformer yang sudah di-fit dan model XGBoost.")
+
+    numeric_columns, mean, scale = None, None, None
+    encoder, categorical_columns = None, None
+    for name, transformer, columns in preprocessor.transformers_:
+        kind = type(transformer).__name__ if not isinstance(transformer, str) else transformer
+        if kind == 'drop' or name == 'remainder':
+            continue
+        if kind == 'StandardScaler' and numeric_columns is None:
+            numeric_columns = list(columns)
+            mean, scale = _compile_scaler(transformer, numeric_columns)
+        elif kind == 'OneHotEncoder' and encoder is None and numeric_columns is not None:
+            encoder, categorical_columns = transformer, list(columns)
+        else:
+            raise ValueError(f"Transformer '{name}' ({kind}) tidak didukung oleh jalur cepat.")
+    if numeric_columns is None or encoder is None:
+        raise ValueError("ColumnTransformer harus berisi StandardScaler diikuti OneHotEncoder.")
+
+    one_hot_features, n_output_features = _compile_one_hot(encoder, categorical_columns, len(numeric_columns))
+    booster = regressor.get_booster()
+    if booster.num_features() != n_output_features:
+        raise ValueError(f"Jumlah fitur hasil kompilasi ({n_output_features}) tidak sama dengan booster ({booster.num_features()}).")
+    try:
+        iteration_range = (0, regressor.best_iteration + 1)
+    except AttributeError:
+        iteration_range = (0, 0)
+
+    return CompiledPredictor(numeric_columns, mean, scale, one_hot_features, n_output_features,
+                             booster, iteration_range, regressor.missing, encoder.handle_unknown)
+
+def compile_or_fallback(pipeline_model):
+    """Mengembalikan prediktor terkompilasi, atau pipeline asli jika strukturnya tidak didukung."""
+    try:
+        return compile_pipeline(pipeline_model)
+    except ValueError as e:
+        print(f"Jalur cepat tidak tersedia, memakai pipeline asli: {e}")
+        return pipeline_model
+
+# ===================================================================================
+# Perbandingan Latensi
+# ===================================================================================
+def _median_seconds(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+def compare_latency(pipeline_model, compiled_predictor, sizes=(1, 100, 100_000), seed=0):
+    """Mengukur median latensi `pipeline.predict` vs prediktor terkompilasi dan selisih maksimum prediksinya."""
+    from preprocessing import engineer_feature_columns, engineer_features
+    from synthetic_data import generate_synthetic_raw_frame
+
+    results = []
+    for n_rows in sizes:
+        input_df_raw = generate_synthetic_raw_frame(n_rows, seed=seed)
+        features_df = engineer_features(input_df_raw)
+        feature_columns = engineer_feature_columns(input_df_raw)
+        repeats = 200 if n_rows <= 100 else 5
+        max_abs_diff = float(np.max(np.abs(pipeline_model.predict(features_df) - compiled_predictor.predict(feature_columns))))
+        pipeline_s = _median_seconds(lambda: pipeline_model.predict(features_df), repeats)
+        compiled_s = _median_seconds(lambda: compiled_predictor.predict(feature_columns), repeats)
+        results.append({'rows': n_rows, 'pipeline_ms': pipeline_s * 1e3, 'compiled_ms': compiled_s * 1e3,
+                        'speedup': pipeline_s / compiled_s, 'max_abs_diff': max_abs_diff})
+    return results
+
+def _traced_peak_mb(fn):
+    """Peak alokasi Python/NumPy (tracemalloc) selama `fn()`, dijalankan di thread baru agar buffer per-thread ikut terhitung."""
+    import tracemalloc
+    result = {}
+    tracemalloc.start()
+    try:
+        worker = threading.Thread(target=lambda: result.setdefault('value', fn()))
+        worker.start()
+        worker.join()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result.get('value'), peak / 2**20
+
+def compare_memory(pipeline_model, compiled_predictor, n_rows=1_000_000, seed=0):
+    """
+    Peak memori (MB, dari DataFrame mentah sampai prediksi) untuk pipeline asli, jalur terkompilasi
+    padat, dan mode hemat memori, beserta selisih maksimum prediksi terhadap pipeline asli.
+
+    tracemalloc hanya melihat alokasi Python/NumPy, bukan memori internal XGBoost; untuk RSS proses
+    lihat kasus end_to_end_* pada benchmark.py.
+    """
+    from preprocessing import engineer_feature_columns, engineer_features
+    from synthetic_data import generate_synthetic_raw_frame
+
+    input_df_raw = generate_synthetic_raw_frame(n_rows, seed=seed)
+    lean_predictor = compiled_predictor.lean()
+    lean_predictor.sparse_booster # Bangun booster CSR di luar pengukuran
+    paths = {
+        'pipeline': lambda: pipeline_model.predict(engineer_features(input_df_raw)),
+        'terkompilasi': lambda: compiled_predictor.predict(engineer_feature_columns(input_df_raw)),
+        'hemat_memori': lambda: lean_predictor.predict(engineer_feature_columns(input_df_raw, compact=True)),
+    }
+    results = []
+    reference = None
+    for name, fn in paths.items():
+        predictions, peak_mb = _traced_peak_mb(fn)
+        if reference is None:
+            reference = predictions
+        results.append({'path': name, 'rows': n_rows, 'peak_mb': peak_mb,
+                        'max_abs_diff': float(np.max(np.abs(predictions - reference)))})
+    return results
+
+def main(argv=None):
+    from batch_scoring import MODEL_FILENAME, load_pipeline
+
+    parser = argparse.ArgumentParser(description="Bandingkan latensi pipeline asli dengan prediktor terkompilasi.")
+    parser.add_argument('--model', default=MODEL_FILENAME, help="Path file model pickle")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 100_000], help="Jumlah baris per pengukuran")
+    parser.add_argument('--tolerance', type=float, default=1e-5, help="Toleransi selisih prediksi (skala log)")
+    parser.add_argument('--memory-rows', type=int, help="Bandingkan peak memori ketiga jalur pada sekian baris (alih-alih latensi)")
+    args = parser.parse_args(argv)
+
+    pipeline_model = load_pipeline(args.model)
+    compiled_predictor = compile_pipeline(pipeline_model)
+    if args.memory_rows:
+        print(f"{'jalur':<14} {'baris':>9} {'peak memori (MB)':>17} {'selisih maks':>13}")
+        results = compare_memory(pipeline_model, compiled_predictor, args.memory_rows)
+        for r in results:
+            print(f"{r['path']:<14} {r['rows']:>9} {r['peak_mb']:>17.1f} {r['max_abs_diff']:>13.2e}")
+        if any(r['max_abs_diff'] > args.tolerance for r in results):
+            print(f"PERINGATAN: selisih prediksi melebihi toleransi {args.tolerance}.")
+            return 1
+        return 0
+    print(f"{'baris':>8} {'pipeline (ms)':>14} {'terkompilasi (ms)':>18} {'percepatan':>11} {'selisih maks':>13}")
+    within_tolerance = True
+    for r in compare_latency(pipeline_model, compiled_predictor, args.sizes):
+        print(f"{r['rows']:>8} {r['pipeline_ms']:>14.3f} {r['compiled_ms']:>18.3f} {r['speedup']:>10.1f}x {r['max_abs_diff']:>13.2e}")
+        within_tolerance &= r['max_abs_diff'] <= args.tolerance
+    if not within_tolerance:
+        print(f"PERINGATAN: selisih prediksi melebihi toleransi {args.tolerance}.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Utilitas baca/tulis bersama untuk antarmuka offline (batch_scoring, parallel_scoring, retrain_model, benchmark):
+deteksi format file, validasi kolom mentah, pembacaan bertahap per potongan, dan peak memori proses.
+"""
+import sys
+
+import pandas as pd
+
+from preprocessing import RAW_INPUT_COLS
+
+# Tipe tetap kolom mentah numerik saat CSV dibaca per potongan: tanpa ini tiap potongan menebak tipenya
+# sendiri (misal humidity int64 di satu potongan, float64 di potongan lain yang berisi pecahan/NaN)
+RAW_NUMERIC_DTYPES = {column_name: 'float64' for column_name in RAW_INPUT_COLS if column_name != 'datetime'}
+
+# ===================================================================================
+# Baca & Validasi Input
+# ===================================================================================
+def detect_format(name):
+    """'parquet' untuk nama berakhiran .parquet/.pq, selain itu 'csv'."""
+    lowered = str(name).lower()
+    if lowered.endswith('.parquet') or lowered.endswith('.pq'):
+        return 'parquet'
+    return 'csv'
+
+def validate_raw_input(df):
+    """Memastikan kolom mentah wajib tersedia dan kolom 'datetime' bertipe datetime."""
+    missing_cols = [c for c in RAW_INPUT_COLS if c not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Kolom wajib tidak ditemukan pada input: {missing_cols}")
+    if not pd.api.types.is_datetime64_any_dtype(df['datetime']):
+        df = df.assign(datetime=pd.to_datetime(df['datetime']))
+    return df
+
+def read_input_table(source, file_format=None):
+    """Membaca file CSV/Parquet (path atau file-like, misal hasil st.file_uploader) menjadi DataFrame mentah."""
+    if file_format is None:
+        file_format = detect_format(getattr(source, 'name', source))
+    if file_format == 'parquet':
+        df = pd.read_parquet(source)
+    else:
+        df = pd.read_csv(source)
+    return validate_raw_input(df)
+
+def iter_input_chunks(path, chunk_size, dtype=None):
+    """
+    Menghasilkan DataFrame mentah per potongan `chunk_size` baris tanpa membaca seluruh file.
+
+    `dtype` (misal RAW_NUMERIC_DTYPES) hanya berlaku untuk CSV; skema Parquet sudah sama di semua potongan.
+    """
+    if detect_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield validate_raw_input(batch.to_pandas())
+    else:
+        with pd.read_csv(path, chunksize=chunk_size, dtype=dtype) as reader:
+            for chunk in reader:
+                yield validate_raw_input(chunk)
+
+# ===================================================================================
+# Memori Proses
+# ===================================================================================
+def peak_rss_mb():
+    """Peak RSS proses saat ini (MB) sejak start; None jika tidak tersedia (Windows)."""
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
@@ -0,0 +1,71 @@
+"""
+Profil permintaan per jam untuk satu hari (24 baris) atau satu minggu (168 baris), opsional
+untuk beberapa skenario cuaca/suhu.
+
+Seluruh grid (jam x skenario) dibangun sebagai satu array lalu diprediksi dengan SATU panggilan
+`predict`, bukan dengan mengulang jalur prediksi satu baris.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import PREDICTION_COLUMN
+from inference import engineer_features_for, predict_counts
+
+HORIZON_HOURS = {'day': 24, 'week': 168}
+SWEEP_COLUMNS = ('weather', 'temp')
+SCENARIO_COLUMN = 'skenario'
+
+def build_profile_grid(start_date, horizon, season, holiday, weather, temp, humidity, windspeed,
+                       sweep_column=None, sweep_values=None):
+    """
+    Membangun DataFrame mentah berisi setiap jam pada horizon untuk setiap nilai skenario.
+
+    `workingday` dihitung per hari (Senin-Jumat dan bukan hari libur). Jika `sweep_column`
+    ('weather' atau 'temp') diberikan, kolom itu diganti berturut-turut dengan setiap nilai di
+    `sweep_values`; baris diurutkan per skenario lalu per jam.
+    """
+    if horizon not in HORIZON_HOURS:
+        raise ValueError(f"Horizon tidak dikenal: {horizon}. Pilihan: {list(HORIZON_HOURS)}")
+    if sweep_column is not None and sweep_column not in SWEEP_COLUMNS:
+        raise ValueError(f"Kolom skenario tidak didukung: {sweep_column}. Pilihan: {list(SWEEP_COLUMNS)}")
+    if sweep_column is not None and not sweep_values:
+        raise ValueError("Nilai skenario tidak boleh kosong.")
+
+    n_hours = HORIZON_HOURS[horizon]
+    hours = np.datetime64(pd.Timestamp(start_date).normalize().to_datetime64(), 'h') + np.arange(n_hours)
+    weekday = (hours.astype('datetime64[D]').astype(np.int64) + 3) % 7 # Senin=0
+    workingday = ((weekday < 5) & (int(holiday) == 0)).astype(np.int64)
+
+    scenario_values = list(sweep_values) if sweep_column is not None else [None]
+    n_scenarios = len(scenario_values)
+    n_rows = n_hours * n_scenarios
+    columns = {
+        'datetime': np.tile(hours, n_scenarios).astype('datetime64[ns]'),
+        'season': np.full(n_rows, int(season)),
+        'holiday': np.full(n_rows, int(holiday)),
+        'workingday': np.tile(workingday, n_scenarios),
+        'weather': np.full(n_rows, int(weather)),
+        'temp': np.full(n_rows, float(temp)),
+        'humidity': np.full(n_rows, int(humidity)),
+        'windspeed': np.full(n_rows, float(windspeed)),
+    }
+    if sweep_column is not None:
+        dtype = np.int64 if sweep_column == 'weather' else np.float64
+        columns[sweep_column] = np.repeat(np.asarray(scenario_values, dtype=dtype), n_hours)
+        columns[SCENARIO_COLUMN] = columns[sweep_column]
+    return pd.DataFrame(columns)
+
+def predict_profile(predictor, profile_grid):
+    """Memprediksi seluruh grid dengan satu panggilan predict; mengembalikan (grid + kolom prediksi, detik)."""
+    start = time.perf_counter()
+    predictions = predict_counts(predictor, engineer_features_for(predictor, profile_grid))
+    elapsed = time.perf_counter() - start
+    return profile_grid.assign(**{PREDICTION_COLUMN: predictions}), elapsed
+
+def profile_to_wide(profile_df):
+    """Bentuk lebar untuk grafik: indeks datetime, satu kolom prediksi per skenario."""
+    if SCENARIO_COLUMN not in profile_df.columns:
+        return profile_df.set_index('datetime')[[PREDICTION_COLUMN]]
+    return profile_df.pivot(index='datetime', columns=SCENARIO_COLUMN, values=PREDICTION_COLUMN)
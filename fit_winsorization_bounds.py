@@ -0,0 +1,35 @@
+"""
+Membuat artefak batas winsorizing (winsorization_bounds.json) dari data latih.
+
+Jalankan sekali pada data latih yang sama dengan yang dipakai notebook (misal train.csv Kaggle):
+
+    python fit_winsorization_bounds.py train.csv
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from preprocessing import WINSORIZATION_BOUNDS_FILENAME, WINSORIZE_LIMITS, fit_winsorization_bounds, save_winsorization_bounds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit batas winsorizing humidity/windspeed dari data latih.")
+    parser.add_argument('train_file', help="File data latih (.csv atau .parquet) dengan kolom: " + ", ".join(WINSORIZE_LIMITS))
+    parser.add_argument('--output', default=WINSORIZATION_BOUNDS_FILENAME, help="Path file JSON output")
+    args = parser.parse_args(argv)
+
+    columns = list(WINSORIZE_LIMITS)
+    if args.train_file.lower().endswith(('.parquet', '.pq')):
+        train_df = pd.read_parquet(args.train_file, columns=columns)
+    else:
+        train_df = pd.read_csv(args.train_file, usecols=columns)
+
+    bounds = fit_winsorization_bounds(train_df)
+    save_winsorization_bounds(bounds, args.output)
+    for column_name, column_bounds in bounds.items():
+        print(f"{column_name}: [{column_bounds['lower']}, {column_bounds['upper']}] (limits={column_bounds['limits']}, n={column_bounds['n_rows']})")
+    print(f"Batas winsorizing disimpan ke: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
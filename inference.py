@@ -0,0 +1,90 @@
+"""
+Langkah inferensi bersama untuk semua antarmuka (halaman Streamlit, prediksi batch, profil, layanan HTTP):
+input mentah -> rekayasa fitur -> predict (skala log) -> jumlah sewa.
+"""
+import numpy as np
+import pandas as pd
+
+from compiled_predictor import CompiledPredictor
+from preprocessing import RAW_INPUT_COLS, engineer_feature_columns, engineer_features
+from stage_metrics import stage_timer
+
+# Ambang saran pada halaman prediksi
+LOW_DEMAND_THRESHOLD = 50
+HIGH_DEMAND_THRESHOLD = 250
+
+def build_raw_input_frame(records):
+    """
+    Membuat DataFrame mentah dari satu dict atau list dict berisi kolom RAW_INPUT_COLS.
+
+    'datetime' boleh berupa string ISO atau objek datetime; zona waktu (jika ada) dibuang dengan
+    mempertahankan jam lokalnya, karena fitur dihitung dari jam dinding.
+    """
+    if isinstance(records, dict):
+        records = [records]
+    with stage_timer('build_dataframe'):
+        input_df_raw = pd.DataFrame.from_records(records)
+        missing_cols = [c for c in RAW_INPUT_COLS if c not in input_df_raw.columns]
+        if missing_cols:
+            raise ValueError(f"Kolom wajib tidak ditemukan pada input: {missing_cols}")
+        try:
+            datetimes = pd.to_datetime(input_df_raw['datetime'])
+        except ValueError:
+            # Campuran zona waktu / naive: buang zona per elemen (jalur lambat, hanya jika perlu)
+            datetimes = pd.to_datetime([pd.Timestamp(v).tz_localize(None) for v in input_df_raw['datetime']])
+        if getattr(datetimes.dtype, 'tz', None) is not None:
+            datetimes = datetimes.dt.tz_localize(None)
+        return input_df_raw.assign(datetime=datetimes)
+
+def engineer_features_for(pipeline_model, input_raw):
+    """
+    Fitur dalam bentuk yang paling murah untuk model: dict array untuk prediktor terkompilasi, DataFrame untuk pipeline.
+
+    Winsorizing memakai batas milik versi model (atribut winsorization_bounds dari model_loader), jika ada.
+    """
+    winsorization_bounds = getattr(pipeline_model, 'winsorization_bounds', None)
+    if isinstance(pipeline_model, CompiledPredictor):
+        return engineer_feature_columns(input_raw, winsorization_bounds, compact=pipeline_model.memory_lean)
+    return engineer_features(input_raw, winsorization_bounds)
+
+def predict_model(pipeline_model, features):
+    """
+    `pipeline_model.predict(features)` dengan pengukuran per tahap.
+
+    CompiledPredictor mengukur tahapnya sendiri; untuk Pipeline scikit-learn, langkah
+    ColumnTransformer dan regressor dipanggil terpisah (setara dengan Pipeline.predict).
+    """
+    if isinstance(pipeline_model, CompiledPredictor):
+        return pipeline_model.predict(features)
+    steps = getattr(pipeline_model, 'steps', None)
+    if steps is not None and len(steps) == 2:
+        with stage_timer('column_transform'):
+            transformed = steps[0][1].transform(features)
+        with stage_timer('booster'):
+            return steps[-1][1].predict(transformed)
+    with stage_timer('booster'):
+        return pipeline_model.predict(features)
+
+def predict_log(pipeline_model, input_raw):
+    """Rekayasa fitur + predict untuk input mentah; mengembalikan prediksi skala log (array)."""
+    return predict_model(pipeline_model, engineer_features_for(pipeline_model, input_raw))
+
+def log_to_counts(prediction_log):
+    """Skala log -> jumlah sewa (bilangan bulat >= 0)."""
+    with stage_timer('expm1'):
+        return np.clip(np.rint(np.expm1(prediction_log)), 0, None).astype(np.int64)
+
+def predict_counts(pipeline_model, input_df_engineered):
+    """Prediksi skala log -> jumlah sewa (bilangan bulat >= 0), sama seperti halaman prediksi tunggal.
+
+    `pipeline_model` boleh berupa pipeline asli atau CompiledPredictor (lihat compiled_predictor.py).
+    """
+    return log_to_counts(predict_model(pipeline_model, input_df_engineered))
+
+def demand_level(predicted_count):
+    """Kategori permintaan yang dipakai untuk saran: 'rendah', 'sedang', atau 'tinggi'."""
+    if predicted_count < LOW_DEMAND_THRESHOLD:
+        return 'rendah'
+    if predicted_count < HIGH_DEMAND_THRESHOLD:
+        return 'sedang'
+    return 'tinggi'
@@ -0,0 +1,214 @@
+"""
+Format artefak cepat-muat: booster XGBoost dalam format biner native (UBJSON) + parameter
+pra-pemrosesan dalam bundel kecil JSON/NumPy yang bisa di-memory-map.
+
+Memuat bundel tidak membutuhkan pickle, scikit-learn, maupun scipy; xgboost baru diimpor saat
+prediksi pertama. Dipakai app.py jika folder bundel ada dan cocok dengan file pickle. Batas winsorizing
+versi model (winsorization_bounds.json di samping pickle, jika ada) ikut disimpan di manifest.
+
+    python model_bundle.py export            # buat bundel dari XGBoost_SKLearn_Pipeline_Final.pkl
+    python model_bundle.py report            # bandingkan waktu startup pickle vs bundel
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import numpy as np
+
+MODEL_FILENAME = 'XGBoost_SKLearn_Pipeline_Final.pkl'
+MODEL_BUNDLE_DIR = 'XGBoost_SKLearn_Pipeline_Final_bundle'
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILENAME = 'manifest.json'
+BOOSTER_FILENAME = 'booster.ubj'
+MEAN_FILENAME = 'numeric_mean.npy'
+SCALE_FILENAME = 'numeric_scale.npy'
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ===================================================================================
+# Ekspor
+# ===================================================================================
+def export_bundle(pipeline_model, bundle_dir=MODEL_BUNDLE_DIR, source_model_path=None, winsorization_bounds=None):
+    """
+    Mengompilasi pipeline lalu menyimpannya sebagai bundel (booster .ubj + .npy + manifest.json).
+
+    `winsorization_bounds` (batas beku dari data latih versi ini) ikut disimpan di manifest.
+    """
+    from compiled_predictor import compile_pipeline
+
+    compiled = compile_pipeline(pipeline_model)
+    os.makedirs(bundle_dir, exist_ok=True)
+    compiled.booster.save_model(os.path.join(bundle_dir, BOOSTER_FILENAME))
+    np.save(os.path.join(bundle_dir, MEAN_FILENAME), compiled.mean)
+    np.save(os.path.join(bundle_dir, SCALE_FILENAME), compiled.scale)
+
+    one_hot_features = []
+    for column_name, categories, index_map in compiled.one_hot_features:
+        if categories is None:
+            offset, value_map = index_map
+            one_hot_features.append({'column': column_name, 'kind': 'int', 'offset': offset,
+                                     'value_map': value_map.tolist()})
+        else:
+            one_hot_features.append({'column': column_name, 'kind': 'hash', 'categories': [str(c) for c in categories],
+                                     'index_map': index_map.tolist()})
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'source_model_sha256': file_sha256(source_model_path) if source_model_path else None,
+        'numeric_columns': compiled.numeric_columns,
+        'one_hot_features': one_hot_features,
+        'n_output_features': compiled.n_output_features,
+        'iteration_range': list(compiled.iteration_range),
+        'missing': None if np.isnan(compiled.missing) else float(compiled.missing),
+        'handle_unknown': compiled.handle_unknown,
+        'winsorization_bounds': winsorization_bounds,
+    }
+    with open(os.path.join(bundle_dir, MANIFEST_FILENAME), 'w') as file:
+        json.dump(manifest, file, indent=2)
+    return bundle_dir
+
+# ===================================================================================
+# Muat
+# ===================================================================================
+def _load_booster(booster_path):
+    import xgboost as xgb # Impor berat ditunda sampai prediksi pertama
+
+    booster = xgb.Booster()
+    booster.load_model(booster_path)
+    return booster
+
+def _read_manifest(bundle_dir, expected_model_path=None):
+    with open(os.path.join(bundle_dir, MANIFEST_FILENAME)) as file:
+        manifest = json.load(file)
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Versi format bundel '{bundle_dir}' tidak didukung: {manifest.get('format_version')}")
+    if expected_model_path is not None and os.path.exists(expected_model_path):
+        if manifest.get('source_model_sha256') != file_sha256(expected_model_path):
+            raise ValueError(f"Bundel '{bundle_dir}' tidak cocok dengan '{expected_model_path}'. Jalankan ulang: python model_bundle.py export")
+    bounds = manifest.get('winsorization_bounds')
+    if bounds is not None:
+        from preprocessing import validate_winsorization_bounds
+        validate_winsorization_bounds(bounds, os.path.join(bundle_dir, MANIFEST_FILENAME))
+    return manifest
+
+def read_bundle_winsorization_bounds(bundle_dir=MODEL_BUNDLE_DIR, expected_model_path=None):
+    """Batas winsorizing dari manifest bundel; None jika bundel dibuat tanpa batas."""
+    return _read_manifest(bundle_dir, expected_model_path).get('winsorization_bounds')
+
+def load_bundle(bundle_dir=MODEL_BUNDLE_DIR, expected_model_path=None):
+    """
+    Memuat bundel menjadi CompiledPredictor tanpa pickle/scikit-learn; booster dimuat saat prediksi pertama.
+
+    Jika `expected_model_path` diberikan, bundel ditolak (ValueError) bila dibuat dari pickle yang berbeda.
+    Batas winsorizing dari manifest (jika ada) dibawa prediktor sebagai atribut winsorization_bounds.
+    """
+    import pandas as pd
+
+    from compiled_predictor import CompiledPredictor
+
+    manifest = _read_manifest(bundle_dir, expected_model_path)
+
+    one_hot_features = []
+    for feature in manifest['one_hot_features']:
+        if feature['kind'] == 'int':
+            one_hot_features.append((feature['column'], None,
+                                     (feature['offset'], np.asarray(feature['value_map'], dtype=np.int64))))
+        else:
+            one_hot_features.append((feature['column'], pd.Index(np.asarray(feature['categories'], dtype=object)),
+                                     np.asarray(feature['index_map'], dtype=np.int64)))
+
+    booster_path = os.path.join(bundle_dir, BOOSTER_FILENAME)
+    return CompiledPredictor(
+        numeric_columns=manifest['numeric_columns'],
+        mean=np.load(os.path.join(bundle_dir, MEAN_FILENAME), mmap_mode='r'),
+        scale=np.load(os.path.join(bundle_dir, SCALE_FILENAME), mmap_mode='r'),
+        one_hot_features=one_hot_features,
+        n_output_features=manifest['n_output_features'],
+        booster=None,
+        iteration_range=tuple(manifest['iteration_range']),
+        missing=np.nan if manifest['missing'] is None else manifest['missing'],
+        handle_unknown=manifest['handle_unknown'],
+        booster_loader=lambda: _load_booster(booster_path),
+        winsorization_bounds=manifest.get('winsorization_bounds'),
+    )
+
+# ===================================================================================
+# Laporan Waktu Startup
+# ===================================================================================
+# Setiap skenario dijalankan di interpreter baru agar biaya impor ikut terukur.
+_STARTUP_SCENARIOS = {
+    'pickle (muat)': """
+import pickle, warnings
+warnings.filterwarnings('ignore')
+with open({model_path!r}, 'rb') as f:
+    model = pickle.load(f)
+""",
+    'pickle (muat + prediksi pertama)': """
+import pickle, warnings
+warnings.filterwarnings('ignore')
+from preprocessing import engineer_features
+from synthetic_data import generate_synthetic_raw_frame
+with open({model_path!r}, 'rb') as f:
+    model = pickle.load(f)
+model.predict(engineer_features(generate_synthetic_raw_frame(1)))
+""",
+    'bundel (muat)': """
+from model_bundle import load_bundle
+model = load_bundle({bundle_dir!r})
+""",
+    'bundel (muat + prediksi pertama)': """
+import warnings
+warnings.filterwarnings('ignore')
+from model_bundle import load_bundle
+from preprocessing import engineer_feature_columns
+from synthetic_data import generate_synthetic_raw_frame
+model = load_bundle({bundle_dir!r})
+model.predict(engineer_feature_columns(generate_synthetic_raw_frame(1)))
+""",
+}
+
+def _time_scenario(code, repeats):
+    timer = "import time as _t; _s = _t.perf_counter()\n" + code + "\nprint(_t.perf_counter() - _s)"
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', timer], cwd=here, check=True, capture_output=True, text=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+def startup_report(model_path=MODEL_FILENAME, bundle_dir=MODEL_BUNDLE_DIR, repeats=5):
+    """Median waktu (detik) tiap skenario startup, termasuk waktu impor library, di proses Python baru."""
+    model_path, bundle_dir = os.path.abspath(model_path), os.path.abspath(bundle_dir)
+    return {name: _time_scenario(code.format(model_path=model_path, bundle_dir=bundle_dir), repeats)
+            for name, code in _STARTUP_SCENARIOS.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor/laporan bundel model cepat-muat.")
+    parser.add_argument('command', choices=['export', 'report'])
+    parser.add_argument('--model', default=MODEL_FILENAME, help="Path file model pickle")
+    parser.add_argument('--bundle-dir', default=MODEL_BUNDLE_DIR, help="Folder bundel")
+    parser.add_argument('--repeats', type=int, default=5, help="Jumlah pengulangan per skenario (report)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        from batch_scoring import load_pipeline
+        from preprocessing import load_winsorization_bounds, winsorization_bounds_path_for
+        export_bundle(load_pipeline(args.model), args.bundle_dir, source_model_path=args.model,
+                      winsorization_bounds=load_winsorization_bounds(winsorization_bounds_path_for(args.model)))
+        print(f"Bundel disimpan ke: {args.bundle_dir}")
+    else:
+        print(f"{'skenario':<34} {'median (ms)':>12}")
+        for name, seconds in startup_report(args.model, args.bundle_dir, args.repeats).items():
+            print(f"{name:<34} {seconds * 1e3:>12.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
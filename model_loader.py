@@ -0,0 +1,144 @@
+"""
+Pemuatan model di thread latar belakang dengan penanda kesiapan (readiness handle).
+
+Halaman yang tidak butuh model (misal Beranda) bisa langsung dirender, sementara halaman prediksi
+menunggu handle. Loader juga menjalankan prediksi sintetis (warm-up) agar prediksi pertama
+pengguna sudah berada pada latensi stabil.
+"""
+import os
+import threading
+import time
+
+from compiled_predictor import compile_or_fallback
+from preprocessing import load_winsorization_bounds, winsorization_bounds_path_for
+from stage_metrics import stage_timer
+
+# Ukuran batch warm-up: 1 baris (jalur halaman prediksi) dan batch kecil (jalur batch/profil)
+WARMUP_BATCH_SIZES = (1, 256)
+
+def load_predictor(model_path, bundle_dir):
+    with stage_timer('load_model'):
+        return _load_predictor(model_path, bundle_dir)
+
+def _load_predictor(model_path, bundle_dir):
+    """
+    Memuat prediktor: bundel cepat-muat jika ada dan cocok dengan pickle, jika tidak pickle + kompilasi.
+    Prediktor membawa batas winsorizing versinya sendiri (lihat attach_winsorization_bounds).
+
+    Berbeda dengan load_pickled_model di app.py, fungsi ini tidak memakai Streamlit dan melempar
+    exception apa adanya sehingga aman dijalankan di thread latar belakang.
+    """
+    from batch_scoring import load_pipeline
+    from model_bundle import load_bundle
+
+    if os.path.isdir(bundle_dir):
+        try:
+            predictor = load_bundle(bundle_dir, expected_model_path=model_path)
+            print(f"Bundel model berhasil dimuat dari: {bundle_dir}")
+            return attach_winsorization_bounds(predictor, model_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Bundel model tidak dipakai, kembali ke pickle: {e}")
+    pipeline_model = load_pipeline(model_path)
+    print(f"Model berhasil dimuat dari: {model_path}")
+    return attach_winsorization_bounds(compile_or_fallback(pipeline_model), model_path)
+
+def attach_winsorization_bounds(predictor, model_path):
+    """
+    Melengkapi atribut `winsorization_bounds` prediktor yang belum membawa batas dari manifest bundel
+    (bundel lama, pickle) dengan artefak di samping pickle-nya. Pipeline scikit-learn juga diberi atribut ini.
+    """
+    if getattr(predictor, 'winsorization_bounds', None) is None:
+        predictor.winsorization_bounds = load_winsorization_bounds(winsorization_bounds_path_for(model_path))
+    return predictor
+
+def model_winsorization_bounds(model_path, bundle_dir):
+    """Batas winsorizing sebuah versi model tanpa memuat booster: manifest bundel, lalu file di samping pickle."""
+    from model_bundle import read_bundle_winsorization_bounds
+
+    if os.path.isdir(bundle_dir):
+        try:
+            bounds = read_bundle_winsorization_bounds(bundle_dir, expected_model_path=model_path)
+            if bounds is not None:
+                return bounds
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Bundel model tidak dipakai, kembali ke pickle: {e}")
+    return load_winsorization_bounds(winsorization_bounds_path_for(model_path))
+
+def limit_predictor_threads(predictor, n_threads):
+    """
+    Membatasi thread XGBoost per panggilan predict. Bawaan XGBoost memakai semua core per panggilan,
+    sehingga N panggilan paralel (worker proses atau thread pool) akan menjalankan N x core thread.
+    """
+    booster = getattr(predictor, 'booster', None)
+    if booster is not None:
+        booster.set_param({'nthread': n_threads})
+        if getattr(predictor, 'memory_lean', False):
+            predictor.sparse_booster.set_param({'nthread': n_threads})
+    elif hasattr(predictor, 'steps'):
+        predictor.steps[-1][1].set_params(n_jobs=n_threads)
+    return predictor
+
+def warm_up_predictor(predictor, batch_sizes=WARMUP_BATCH_SIZES):
+    """Menjalankan prediksi sintetis agar biaya sekali-jalan (impor xgboost, muat booster, inisialisasi thread) dibayar di awal."""
+    from inference import engineer_features_for
+    from synthetic_data import generate_synthetic_raw_frame
+
+    with stage_timer('warm_up'):
+        getattr(predictor, 'booster', None) # Muat booster bundel (dan impor xgboost) di luar tahap 'booster'
+    for n_rows in batch_sizes:
+        predictor.predict(engineer_features_for(predictor, generate_synthetic_raw_frame(n_rows, seed=n_rows)))
+    return predictor
+
+class BackgroundLoader:
+    """
+    Menjalankan `load_fn` sekali di thread daemon; `wait()` mengembalikan hasilnya atau melempar ulang exception-nya.
+
+    Jika `after` diberikan (BackgroundLoader lain), pemuatan baru dimulai setelah `after` selesai
+    agar dua pemuatan berat tidak berebut CPU.
+    """
+
+    def __init__(self, name, load_fn, after=None):
+        self.name = name
+        self._load_fn = load_fn
+        self._after = after
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        self.load_seconds = None
+        self._thread = threading.Thread(target=self._run, name=f"model-loader-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        if self._after is not None:
+            self._after._done.wait()
+        start = time.perf_counter()
+        try:
+            self._result = self._load_fn()
+        except BaseException as e: # Disimpan dan dilempar ulang ke pemanggil wait()
+            self._error = e
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self._done.set()
+
+    def is_ready(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Menunggu hingga pemuatan selesai. Melempar TimeoutError jika melewati `timeout` detik."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Pemuatan '{self.name}' belum selesai setelah {timeout} detik.")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+def start_pipeline_preload(model_path, after=None):
+    """Memulai pemuatan pipeline scikit-learn lengkap (untuk halaman Info Model) di latar belakang."""
+    def _load_pipeline():
+        from batch_scoring import load_pipeline
+        with stage_timer('load_pipeline'):
+            return load_pipeline(model_path)
+
+    return BackgroundLoader('pipeline', _load_pipeline, after=after).start()
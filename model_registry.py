@@ -0,0 +1,369 @@
+"""
+Registri model multi-versi dengan hot-reload.
+
+Registri memantau file artefak model (pickle, booster + manifest bundel, batas winsorizing) dan
+memuat versi baru di thread latar belakang, lalu memindahkan trafik dengan SATU penggantian
+referensi. Prediksi yang sedang berjalan tetap memakai objek prediktor yang sudah diambilnya,
+jadi tidak ada yang terputus. Beberapa versi terakhir disimpan dalam LRU kecil sehingga rollback
+tidak perlu memuat ulang.
+
+Mode bayangan (shadow) opsional: versi baru tidak langsung dipakai, melainkan menjadi kandidat
+yang ikut menilai input yang sama di belakang layar; selisihnya terhadap versi aktif dicatat
+sampai kandidat dipromosikan secara manual.
+
+Konfigurasi lewat variabel lingkungan (lihat registry_settings_from_env):
+    MODEL_RELOAD_POLL_SECONDS   interval pemeriksaan artefak (bawaan 5; 0 = tidak memantau)
+    MODEL_REGISTRY_MAX_VERSIONS jumlah versi yang disimpan untuk rollback (bawaan 3)
+    MODEL_SHADOW                '1' = versi baru menjadi kandidat bayangan, bukan langsung aktif
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from model_bundle import BOOSTER_FILENAME, MANIFEST_FILENAME
+from model_loader import BackgroundLoader, load_predictor, warm_up_predictor
+from prediction_cache import artifact_version
+from preprocessing import winsorization_bounds_path_for
+
+DEFAULT_MAX_VERSIONS = 3
+DEFAULT_POLL_SECONDS = 5.0
+# Jumlah maksimum pekerjaan bayangan yang boleh antre; selebihnya dilewati agar memori tetap terbatas
+MAX_PENDING_SHADOW_JOBS = 8
+
+def registry_settings_from_env():
+    """Argumen ModelRegistry dari variabel lingkungan (lihat docstring modul)."""
+    return {
+        'poll_seconds': float(os.environ.get('MODEL_RELOAD_POLL_SECONDS', DEFAULT_POLL_SECONDS)),
+        'max_versions': int(os.environ.get('MODEL_REGISTRY_MAX_VERSIONS', DEFAULT_MAX_VERSIONS)),
+        'shadow': os.environ.get('MODEL_SHADOW', '0') == '1',
+    }
+
+class ModelVersion:
+    """Satu versi model yang sudah dimuat: sidik jari artefak + prediktor siap pakai."""
+
+    def __init__(self, number, fingerprint, predictor, load_seconds):
+        self.number = number
+        self.fingerprint = fingerprint
+        self.predictor = predictor
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        mtimes = [mtime for _, _, mtime in fingerprint if mtime is not None]
+        self.modified_at = max(mtimes) / 1e9 if mtimes else None
+
+    @property
+    def label(self):
+        if self.modified_at is None:
+            return f"v{self.number}"
+        return f"v{self.number} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.modified_at))})"
+
+class ShadowStats:
+    """Akumulasi selisih prediksi kandidat terhadap versi aktif (dalam jumlah sewa)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.rows = 0
+            self.skipped = 0
+            self.errors = 0
+            self._sum_abs_diff = 0.0
+            self.max_abs_diff = 0.0
+
+    def record(self, live_counts, candidate_counts):
+        diff = np.abs(np.asarray(candidate_counts, dtype=np.float64) - np.asarray(live_counts, dtype=np.float64))
+        with self._lock:
+            self.rows += len(diff)
+            self._sum_abs_diff += float(diff.sum())
+            self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0.0)))
+
+    def record_skipped(self):
+        with self._lock:
+            self.skipped += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'rows': self.rows,
+                'mean_abs_diff': self._sum_abs_diff / self.rows if self.rows else 0.0,
+                'max_abs_diff': self.max_abs_diff,
+                'skipped': self.skipped,
+                'errors': self.errors,
+            }
+
+class ModelRegistry:
+    """
+    Versi aktif + LRU versi terbaru + kandidat bayangan opsional, dengan pemantau artefak.
+
+    Antarmuka `is_ready()` / `wait(timeout)` sama dengan BackgroundLoader (wait mengembalikan
+    prediktor versi aktif), sehingga bisa langsung dipakai oleh wait_for_model di app.py.
+    """
+
+    def __init__(self, model_path, bundle_dir, max_versions=DEFAULT_MAX_VERSIONS,
+                 poll_seconds=DEFAULT_POLL_SECONDS, shadow=False, warm_up=True):
+        if max_versions < 1:
+            raise ValueError("max_versions registri model harus minimal 1.")
+        self.model_path = model_path
+        self.bundle_dir = bundle_dir
+        self.max_versions = max_versions
+        self.poll_seconds = poll_seconds
+        self.shadow = shadow
+        self.warm_up = warm_up
+        self._lock = threading.Lock()
+        # Memeriksa + memuat artefak (pemantau dan tombol UI) hanya boleh berjalan satu per satu
+        self._check_lock = threading.Lock()
+        self._versions = OrderedDict() # sidik jari -> ModelVersion, terbaru dipakai di akhir
+        self._live = None
+        self._candidate = None
+        self.initial_version = None
+        self._next_number = 1
+        self._pending_fingerprint = None
+        self._failed_fingerprint = None
+        # Sidik jari artefak pada pemeriksaan terakhir, dan sidik jari versi yang ditinggalkan lewat
+        # rollback/discard_candidate: keduanya mencegah pemantau mengadopsi ulang versi LRU yang sama
+        self._last_seen_fingerprint = None
+        self._dismissed_fingerprint = None
+        self.last_error = None
+        self.last_checked = None
+        self.shadow_stats = ShadowStats()
+        self._shadow_slots = threading.BoundedSemaphore(MAX_PENDING_SHADOW_JOBS)
+        self._shadow_executor = None
+        self._stop = threading.Event()
+        self.initial_load = BackgroundLoader('prediktor', self._load_initial)
+        self._watcher = threading.Thread(target=self._watch, name='model-registry-watcher', daemon=True)
+
+    # ---------------------------------------------------------------------------
+    # Pemuatan & Pemantauan
+    # ---------------------------------------------------------------------------
+    def artifact_paths(self):
+        # Manifest bundel dan artefak di samping pickle membawa batas winsorizing versi model
+        return (self.model_path, os.path.join(self.bundle_dir, BOOSTER_FILENAME),
+                os.path.join(self.bundle_dir, MANIFEST_FILENAME), winsorization_bounds_path_for(self.model_path))
+
+    def start(self):
+        self.initial_load.start()
+        if self.poll_seconds > 0:
+            self._watcher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._shadow_executor is not None:
+            self._shadow_executor.shutdown(wait=False)
+
+    def _load_version(self, fingerprint):
+        start = time.perf_counter()
+        predictor = load_predictor(self.model_path, self.bundle_dir)
+        if self.warm_up:
+            predictor = warm_up_predictor(predictor)
+        with self._lock:
+            version = ModelVersion(self._next_number, fingerprint, predictor, time.perf_counter() - start)
+            self._next_number += 1
+            self._remember(version)
+        return version
+
+    def _load_initial(self):
+        with self._check_lock: # Tombol "periksa" yang ditekan saat pemuatan awal menunggu, bukan memuat ganda
+            fingerprint = artifact_version(*self.artifact_paths())
+            version = self._load_version(fingerprint)
+            self._last_seen_fingerprint = fingerprint
+        with self._lock:
+            self._live = version
+            self.initial_version = version
+        return version
+
+    def _remember(self, version):
+        # Dipanggil dengan lock dipegang
+        self._versions[version.fingerprint] = version
+        self._versions.move_to_end(version.fingerprint)
+        self._trim(keep=version)
+
+    def _trim(self, keep=None):
+        # Dipanggil dengan lock dipegang; versi aktif, kandidat, dan `keep` tidak pernah dikeluarkan
+        for fingerprint in list(self._versions):
+            if len(self._versions) <= self.max_versions:
+                break
+            if self._versions[fingerprint] not in (self._live, self._candidate, keep):
+                del self._versions[fingerprint]
+
+    def _watch(self):
+        try:
+            self.initial_load.wait()
+        except Exception: # Pemuatan awal gagal: tetap pantau agar artefak yang diperbaiki bisa dimuat
+            pass
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check_for_update()
+            except Exception as e: # Pemantau tidak boleh mati; versi aktif tetap dipakai
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    def check_for_update(self, require_stable=True):
+        """
+        Satu langkah pemantauan; mengembalikan versi yang baru dimuat/diaktifkan atau None.
+
+        Artefak baru dimuat setelah sidik jarinya sama pada dua pemeriksaan berturut-turut
+        (`require_stable`), agar file yang masih disalin tidak ikut dimuat. Versi yang gagal
+        dimuat tidak dicoba ulang sampai artefaknya berubah lagi. Versi yang masih ada di LRU hanya
+        diadopsi ulang jika artefak di disk berubah sejak pemeriksaan sebelumnya, dan versi yang
+        ditinggalkan lewat rollback/discard_candidate tidak diadopsi ulang sampai artefaknya berubah.
+        Pemanggilan bersamaan (pemantau dan tombol di UI) diserialkan: pemanggil kedua menunggu lalu
+        melihat versi yang sudah dimuat.
+        """
+        with self._check_lock:
+            return self._check_for_update(require_stable)
+
+    def _check_for_update(self, require_stable):
+        fingerprint = artifact_version(*self.artifact_paths())
+        self.last_checked = time.time()
+        changed = fingerprint != self._last_seen_fingerprint
+        self._last_seen_fingerprint = fingerprint
+        with self._lock:
+            if changed and fingerprint != self._dismissed_fingerprint:
+                self._dismissed_fingerprint = None
+            known = self._versions.get(fingerprint)
+            current = {v.fingerprint for v in (self._live, self._candidate) if v is not None}
+            dismissed = fingerprint == self._dismissed_fingerprint
+        if fingerprint in current or fingerprint == self._failed_fingerprint or dismissed:
+            self._pending_fingerprint = None
+            return None
+        if known is not None: # Artefak lama dikembalikan: pakai versi yang masih ada di LRU
+            return self._adopt(known) if changed else None
+        if require_stable and fingerprint != self._pending_fingerprint:
+            self._pending_fingerprint = fingerprint
+            return None
+        self._pending_fingerprint = None
+        try:
+            version = self._load_version(fingerprint)
+        except Exception as e:
+            self._failed_fingerprint = fingerprint
+            self.last_error = f"Gagal memuat versi baru: {type(e).__name__}: {e}"
+            print(self.last_error)
+            return None
+        self.last_error = None
+        print(f"Versi model baru dimuat: {version.label} ({version.load_seconds:.1f} detik)")
+        return self._adopt(version)
+
+    def _adopt(self, version):
+        if self.shadow and self._live is not None:
+            with self._lock:
+                self._candidate = version
+                self._trim()
+            self.shadow_stats.reset()
+        else:
+            self.activate(version.number)
+        return version
+
+    # ---------------------------------------------------------------------------
+    # Peralihan Versi
+    # ---------------------------------------------------------------------------
+    def _find(self, number):
+        for version in self._versions.values():
+            if version.number == number:
+                return version
+        raise KeyError(f"Versi v{number} tidak ada di registri (mungkin sudah dikeluarkan dari LRU).")
+
+    def activate(self, number):
+        """Menjadikan versi `number` (harus masih ada di LRU) sebagai versi aktif, secara atomik."""
+        with self._lock:
+            version = self._find(number)
+            self._versions.move_to_end(version.fingerprint)
+            if self._candidate is version:
+                self._candidate = None
+            self._live = version
+            self._trim()
+        return version
+
+    def rollback(self):
+        """Kembali ke versi sebelumnya yang paling baru dipakai; mengembalikan versi tersebut atau None."""
+        with self._lock:
+            previous = [v for v in reversed(self._versions.values()) if v not in (self._live, self._candidate)]
+            if not previous:
+                return None
+            # Artefak di disk masih versi yang ditinggalkan; pemantau tidak boleh mengaktifkannya lagi
+            self._dismissed_fingerprint = self._live.fingerprint
+        return self.activate(previous[0].number)
+
+    def promote_candidate(self):
+        candidate = self._candidate
+        return self.activate(candidate.number) if candidate is not None else None
+
+    def discard_candidate(self):
+        with self._lock:
+            if self._candidate is not None:
+                self._dismissed_fingerprint = self._candidate.fingerprint
+            self._candidate = None
+
+    # ---------------------------------------------------------------------------
+    # Akses & Prediksi
+    # ---------------------------------------------------------------------------
+    def is_ready(self):
+        return self._live is not None or self.initial_load.is_ready()
+
+    def wait(self, timeout=None):
+        """Menunggu pemuatan awal; mengembalikan prediktor versi aktif."""
+        live = self._live
+        if live is not None: # Termasuk versi yang dimuat pemantau setelah pemuatan awal gagal
+            return live.predictor
+        self.initial_load.wait(timeout)
+        return self._live.predictor
+
+    @property
+    def live(self):
+        return self._live
+
+    @property
+    def candidate(self):
+        return self._candidate
+
+    def versions(self):
+        """Versi di LRU, terbaru dipakai lebih dulu."""
+        with self._lock:
+            return list(reversed(self._versions.values()))
+
+    def predict_log(self, input_raw):
+        """Prediksi skala log dengan versi aktif; jika ada kandidat, input yang sama dinilai di belakang layar."""
+        from inference import log_to_counts, predict_log
+        prediction_log = predict_log(self._live.predictor, input_raw)
+        if self._candidate is not None:
+            self.shadow_score(input_raw, log_to_counts(prediction_log))
+        return prediction_log
+
+    def shadow_score(self, input_raw, live_counts):
+        """
+        Menilai `input_raw` dengan kandidat bayangan di belakang layar dan membandingkannya dengan
+        `live_counts` (jumlah sewa dari versi aktif). Tidak melakukan apa pun tanpa kandidat.
+
+        Untuk halaman yang memprediksi langsung dengan prediktor aktif (profil, batch) atau mengambil
+        hasil dari cache prediksi, agar kandidat melihat trafik yang sama dengan versi aktif.
+        """
+        candidate = self._candidate
+        if candidate is None:
+            return
+        if not self._shadow_slots.acquire(blocking=False):
+            self.shadow_stats.record_skipped()
+            return
+        if self._shadow_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-shadow')
+        try:
+            self._shadow_executor.submit(self._run_shadow, candidate, input_raw, live_counts)
+        except RuntimeError: # Executor sudah dimatikan (stop)
+            self._shadow_slots.release()
+
+    def _run_shadow(self, candidate, input_raw, live_counts):
+        from inference import log_to_counts, predict_log
+        try:
+            candidate_log = predict_log(candidate.predictor, input_raw)
+            self.shadow_stats.record(live_counts, log_to_counts(candidate_log))
+        except Exception:
+            self.shadow_stats.record_error()
+        finally:
+            self._shadow_slots.release()
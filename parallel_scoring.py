@@ -0,0 +1,200 @@
+"""
+Prediksi batch paralel multi-proses untuk file historis yang sangat besar (backfill bertahun-tahun).
+
+File input dibaca bertahap per potongan baris; setiap potongan dikerjakan oleh salah satu proses
+worker yang memuat artefak model SEKALI saat start (lihat model_loader.load_predictor). Worker
+menulis hasil potongannya ke file shard Parquet bernomor, lalu proses utama menggabungkan shard
+ke file output sesuai urutan aslinya begitu tersedia, sehingga memori proses utama tetap terbatas.
+
+    python parallel_scoring.py input.csv hasil.csv --workers 8 --chunk-size 200000
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from batch_scoring import MODEL_FILENAME, PREDICTION_COLUMN, to_lean_predictor
+from data_io import RAW_NUMERIC_DTYPES, detect_format, iter_input_chunks
+from model_bundle import MODEL_BUNDLE_DIR
+from preprocessing import RAW_INPUT_COLS
+
+DEFAULT_SHARD_ROWS = 200_000
+# Potongan yang boleh antre per worker; membatasi jumlah potongan mentah di memori proses utama
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# ===================================================================================
+# Worker
+# ===================================================================================
+_worker_predictor = None
+
+def _init_worker(model_path, bundle_dir, threads_per_worker, lean):
+    global _worker_predictor
+    import warnings
+    warnings.filterwarnings('ignore')
+    from model_loader import limit_predictor_threads, load_predictor
+    _worker_predictor = load_predictor(model_path, bundle_dir)
+    if lean:
+        _worker_predictor = to_lean_predictor(_worker_predictor)
+    # Batasi thread per worker agar total thread tidak melebihi jumlah core
+    limit_predictor_threads(_worker_predictor, threads_per_worker)
+
+def _score_shard(shard_index, input_df_raw, shard_dir):
+    """Rekayasa fitur + prediksi satu potongan, tulis ke shard Parquet; mengembalikan (indeks, path, baris)."""
+    from inference import engineer_features_for, predict_counts
+    predictions = predict_counts(_worker_predictor, engineer_features_for(_worker_predictor, input_df_raw))
+    shard_path = os.path.join(shard_dir, f"shard_{shard_index:06d}.parquet")
+    input_df_raw.assign(**{PREDICTION_COLUMN: predictions}).to_parquet(shard_path, index=False)
+    return shard_index, shard_path, len(input_df_raw)
+
+# ===================================================================================
+# Penggabungan Shard Berurutan
+# ===================================================================================
+class _OrderedShardWriter:
+    """Menulis shard ke file output sesuai indeksnya; shard yang datang lebih awal menunggu gilirannya."""
+
+    def __init__(self, output_path, file_format=None):
+        self.output_path = output_path
+        self.file_format = file_format or detect_format(output_path)
+        self._pending = {}
+        self._next_index = 0
+        self._parquet_writer = None
+        self._csv_file = None
+
+    def add(self, shard_index, shard_path):
+        self._pending[shard_index] = shard_path
+        while self._next_index in self._pending:
+            self._append(self._pending.pop(self._next_index))
+            self._next_index += 1
+
+    def _append(self, shard_path):
+        if self.file_format == 'parquet':
+            import pyarrow.parquet as pq
+            table = pq.read_table(shard_path)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            elif not table.schema.equals(self._parquet_writer.schema):
+                table = self._cast_to_output_schema(table)
+            self._parquet_writer.write_table(table)
+        else:
+            header = self._csv_file is None
+            if header:
+                self._csv_file = open(self.output_path, 'w', newline='')
+            pd.read_parquet(shard_path).to_csv(self._csv_file, index=False, header=header)
+        os.remove(shard_path)
+
+    def _cast_to_output_schema(self, table):
+        """Menyamakan tipe kolom shard dengan skema file output (dari shard pertama), misal int64 -> float64."""
+        import pyarrow as pa
+        try:
+            return table.cast(self._parquet_writer.schema)
+        except (pa.ArrowInvalid, ValueError) as e:
+            raise ValueError(f"Tipe kolom shard {self._next_index} tidak cocok dengan shard pertama dan tidak bisa "
+                             f"dikonversi tanpa kehilangan nilai: {e}") from e
+
+    def finish(self):
+        """Memastikan semua shard sudah tertulis, lalu menutup file output."""
+        if self._pending:
+            raise RuntimeError(f"Shard tidak lengkap, menunggu indeks {self._next_index}.")
+        self.close()
+
+    def close(self):
+        """Menutup file output tanpa pemeriksaan; aman dipanggil berulang, juga setelah error."""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+
+# ===================================================================================
+# Skoring Paralel
+# ===================================================================================
+def score_file_parallel(input_path, output_path, model_path=MODEL_FILENAME, bundle_dir=MODEL_BUNDLE_DIR,
+                        workers=None, chunk_size=DEFAULT_SHARD_ROWS, threads_per_worker=1, lean=False):
+    """
+    Memberi skor file CSV/Parquet dengan `workers` proses; output berisi kolom input + `prediksi_jumlah_sewa`
+    dalam urutan baris yang sama dengan input. Mengembalikan dict statistik.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size harus lebih besar dari 0.")
+    workers = workers or os.cpu_count() or 1
+    if workers <= 0:
+        raise ValueError("workers harus lebih besar dari 0.")
+
+    start = time.perf_counter()
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    shard_dir = tempfile.mkdtemp(prefix='.shards_', dir=output_dir)
+    # Output ditulis ke file sementara di direktori yang sama dan baru dipindahkan ke output_path jika
+    # semua shard berhasil, sehingga kegagalan di tengah jalan tidak meninggalkan file terpotong
+    writer = _OrderedShardWriter(os.path.join(shard_dir, 'output.partial'), detect_format(output_path))
+    n_rows = 0
+    n_shards = 0
+    try:
+        # spawn: hindari fork dari proses yang sudah memiliki thread pool OpenMP XGBoost
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(model_path, bundle_dir, threads_per_worker, lean)) as pool:
+            in_flight = set()
+
+            def collect(return_when):
+                nonlocal n_rows, in_flight
+                done, in_flight = wait(in_flight, return_when=return_when)
+                for future in done:
+                    shard_index, shard_path, shard_rows = future.result()
+                    writer.add(shard_index, shard_path)
+                    n_rows += shard_rows
+
+            # Output Parquet butuh skema yang sama di semua shard; output CSV memakai tipe hasil tebakan per potongan
+            read_dtype = RAW_NUMERIC_DTYPES if writer.file_format == 'parquet' else None
+            for shard_index, chunk in enumerate(iter_input_chunks(input_path, chunk_size, dtype=read_dtype)):
+                if len(in_flight) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                    collect(FIRST_COMPLETED)
+                in_flight.add(pool.submit(_score_shard, shard_index, chunk, shard_dir))
+                n_shards += 1
+            collect('ALL_COMPLETED')
+        writer.finish()
+        if os.path.exists(writer.output_path):
+            os.replace(writer.output_path, output_path)
+    finally:
+        writer.close()
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': n_rows,
+        'shards': n_shards,
+        'workers': workers,
+        'seconds': elapsed,
+        'rows_per_sec': n_rows / elapsed if elapsed > 0 else float('inf'),
+    }
+
+# ===================================================================================
+# Entry Point CLI
+# ===================================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prediksi batch paralel multi-proses untuk file CSV/Parquet besar.")
+    parser.add_argument('input', help="File input (.csv atau .parquet) berisi kolom: " + ", ".join(RAW_INPUT_COLS))
+    parser.add_argument('output', help="File output (.csv atau .parquet)")
+    parser.add_argument('--model', default=MODEL_FILENAME, help="Path file model pickle")
+    parser.add_argument('--bundle-dir', default=MODEL_BUNDLE_DIR, help="Direktori bundel cepat-muat (dipakai jika cocok dengan pickle)")
+    parser.add_argument('--workers', type=int, default=None, help="Jumlah proses worker (bawaan: jumlah core)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_SHARD_ROWS, help="Jumlah baris per shard")
+    parser.add_argument('--threads-per-worker', type=int, default=1, help="Thread XGBoost per worker")
+    parser.add_argument('--lean', action='store_true', help="Mode hemat memori per worker: fitur bertipe ringkas + matriks CSR")
+    args = parser.parse_args(argv)
+
+    stats = score_file_parallel(args.input, args.output, model_path=args.model, bundle_dir=args.bundle_dir,
+                                workers=args.workers, chunk_size=args.chunk_size,
+                                threads_per_worker=args.threads_per_worker, lean=args.lean)
+    print(f"{stats['rows']} baris ({stats['shards']} shard, {stats['workers']} worker) diprediksi dalam "
+          f"{stats['seconds']:.2f} detik ({stats['rows_per_sec']:,.0f} baris/detik). Hasil disimpan ke: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Cache prediksi bersama (satu per proses, dipakai semua sesi Streamlit) dengan eviksi LRU terbatas.
+
+Ruang input halaman prediksi kecil dan sering berulang (jam per 1 jam, enum kecil, langkah widget
+tetap), jadi hasil prediksi disimpan per tuple input yang dinormalisasi. Ini aman karena rekayasa
+fitur per baris tidak bergantung pada baris lain (batas winsorizing beku, lihat preprocessing.py).
+Cache dikosongkan otomatis ketika artefak model berubah.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_SIZE = 4096
+MAX_SIZE_ENV_VAR = 'PREDICTION_CACHE_MAX_SIZE'
+
+def configured_max_size():
+    """Ukuran maksimum dari variabel lingkungan PREDICTION_CACHE_MAX_SIZE (bawaan 4096)."""
+    return int(os.environ.get(MAX_SIZE_ENV_VAR, DEFAULT_MAX_SIZE))
+
+def artifact_version(*paths):
+    """Sidik jari murah (ukuran + mtime) dari file artefak model; berubah jika salah satu file diganti."""
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            version.append((path, None, None))
+    return tuple(version)
+
+def normalize_prediction_inputs(dt_object, season, holiday, workingday, weather, temp, humidity, windspeed):
+    """
+    Kunci cache dari input halaman prediksi.
+
+    Waktu dibulatkan ke jam (menit tidak dipakai fitur mana pun), kode kategori menjadi int, dan
+    nilai numerik dibulatkan ke presisi widget agar noise float tidak memecah entri yang sama.
+    """
+    return (
+        dt_object.year, dt_object.month, dt_object.day, dt_object.hour,
+        int(season), int(holiday), int(workingday), int(weather),
+        round(float(temp), 1), int(round(float(humidity))), round(float(windspeed), 1),
+    )
+
+class PredictionCache:
+    """LRU thread-safe: kunci -> hasil prediksi, dengan penghitung hit/miss/eviksi/invalidasi."""
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        if max_size < 1:
+            raise ValueError("max_size cache prediksi harus minimal 1.")
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        # Dipanggil dengan lock dipegang
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._version = version
+
+    def get_or_compute(self, key, compute_fn, version=None):
+        """Mengembalikan nilai tersimpan untuk `key`, atau menghitungnya dengan `compute_fn()` lalu menyimpannya."""
+        with self._lock:
+            self._check_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Dihitung di luar lock agar sesi lain tidak menunggu prediksi ini
+        value = compute_fn()
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        """Nilai tersimpan untuk setiap kunci (None jika belum ada), dalam satu pengambilan lock."""
+        with self._lock:
+            self._check_version(version)
+            values = []
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(self._entries[key])
+                else:
+                    self.misses += 1
+                    values.append(None)
+            return values
+
+    def put_many(self, keys, values, version=None):
+        """Menyimpan banyak nilai sekaligus (misal hasil satu lintasan vektor untuk baris yang belum ada di cache)."""
+        with self._lock:
+            if version != self._version:
+                return
+            for key, value in zip(keys, values):
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
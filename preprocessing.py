@@ -0,0 +1,306 @@
+import functools
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from stage_metrics import stage_timer
+
+# ===================================================================================
+# Definisi Fungsi Pra-pemrosesan (Sama seperti di Notebook Colab)
+# ===================================================================================
+def winsorize_series_robust(df_or_series, column_name=None, limits=(0.01, 0.01)):
+    if isinstance(df_or_series, pd.DataFrame):
+        if column_name is None or column_name not in df_or_series.columns:
+            # Jika kolom tidak ada, kembalikan DataFrame asli tanpa error
+            # print(f"Peringatan: Kolom '{column_name}' untuk winsorizing tidak ditemukan di DataFrame.")
+            return df_or_series
+        series_to_winsorize = df_or_series[column_name].copy()
+    elif isinstance(df_or_series, pd.Series):
+        series_to_winsorize = df_or_series.copy()
+        column_name = df_or_series.name # Ambil nama kolom dari series
+    else:
+        raise ValueError("Input harus DataFrame atau Series Pandas.")
+
+    # Impor di sini: jalur inferensi memakai batas beku (apply_winsorization_bounds) dan tidak butuh scipy
+    from scipy.stats.mstats import winsorize
+    winsorized_array = winsorize(series_to_winsorize, limits=limits)
+    
+    if isinstance(df_or_series, pd.DataFrame):
+        df_out = df_or_series.copy()
+        df_out[column_name] = winsorized_array
+        return df_out
+    else:
+        return pd.Series(winsorized_array, name=column_name, index=df_or_series.index)
+
+def preprocess_initial_features(input_df):
+    df = input_df.copy()
+    if 'datetime' in df.columns:
+        df['hour_val'] = df['datetime'].dt.hour
+        df['month_val'] = df['datetime'].dt.month
+        df['weekday_val'] = df['datetime'].dt.weekday # Senin=0, Minggu=6
+        df['day'] = df['datetime'].dt.day
+        df['year_cat'] = df['datetime'].dt.year.astype(str) 
+        df['dayofyear'] = df['datetime'].dt.dayofyear
+        # Kolom 'datetime' asli akan di-drop nanti setelah semua fitur turunan dibuat,
+        # sebelum dimasukkan ke ColumnTransformer jika CT tidak mengharapkannya.
+    if 'atemp' in df.columns:
+        df = df.drop('atemp', axis=1, errors='ignore')
+    # Kolom 'casual' dan 'registered' tidak ada di input dari Streamlit
+    return df
+
+def create_cyclical_features(input_df):
+    df = input_df.copy()
+    if 'hour_val' in df.columns:
+        df['hour_sin'] = np.sin(2 * np.pi * df['hour_val']/24.0)
+        df['hour_cos'] = np.cos(2 * np.pi * df['hour_val']/24.0)
+    if 'month_val' in df.columns:
+        df['month_sin'] = np.sin(2 * np.pi * df['month_val']/12.0)
+        df['month_cos'] = np.cos(2 * np.pi * df['month_val']/12.0)
+    if 'weekday_val' in df.columns:
+        df['weekday_sin'] = np.sin(2 * np.pi * df['weekday_val']/7.0)
+        df['weekday_cos'] = np.cos(2 * np.pi * df['weekday_val']/7.0)
+    return df
+
+# ===================================================================================
+# Kolom yang diharapkan oleh ColumnTransformer (preprocessor) di dalam pipeline
+# ===================================================================================
+# Harus sama dengan `numeric_features_for_scaling` + `categorical_features_for_ohe`
+# di notebook setelah semua rekayasa fitur manual.
+EXPECTED_COLS_FOR_CT = [
+    'temp', 'humidity', 'windspeed', 'day', 'dayofyear',
+    'hour_sin', 'hour_cos', 'month_sin', 'month_cos',
+    'weekday_sin', 'weekday_cos', 'season', 'holiday',
+    'workingday', 'weather', 'hour_val', 'month_val',
+    'weekday_val', 'year_cat'
+]
+
+# Kolom mentah yang wajib ada pada input (format data Kaggle tanpa 'atemp', 'casual', 'registered')
+RAW_INPUT_COLS = ['datetime', 'season', 'holiday', 'workingday', 'weather', 'temp', 'humidity', 'windspeed']
+
+# ===================================================================================
+# Featurizer Satu-Lintasan (tanpa salinan DataFrame berantai)
+# ===================================================================================
+# Tabel sin/cos yang dihitung sekali: nilai identik dengan create_cyclical_features
+# karena memakai ekspresi yang sama, hanya diindeks alih-alih dihitung ulang per baris.
+_HOUR_STEPS = np.arange(24)
+_MONTH_STEPS = np.arange(13) # indeks 0 tidak dipakai, bulan 1..12
+_WEEKDAY_STEPS = np.arange(7)
+HOUR_SIN_LUT = np.sin(2 * np.pi * _HOUR_STEPS/24.0)
+HOUR_COS_LUT = np.cos(2 * np.pi * _HOUR_STEPS/24.0)
+MONTH_SIN_LUT = np.sin(2 * np.pi * _MONTH_STEPS/12.0)
+MONTH_COS_LUT = np.cos(2 * np.pi * _MONTH_STEPS/12.0)
+WEEKDAY_SIN_LUT = np.sin(2 * np.pi * _WEEKDAY_STEPS/7.0)
+WEEKDAY_COS_LUT = np.cos(2 * np.pi * _WEEKDAY_STEPS/7.0)
+
+WINSORIZE_LIMITS = {'humidity': (0.01, 0.01), 'windspeed': (0.05, 0.05)}
+
+# Tipe data mode hemat memori (compact=True): kolom integer/kategori sebagai int8/int16.
+# Kolom kontinu (temp, humidity, windspeed, sin/cos) sengaja tetap float64: ambang split XGBoost
+# jatuh tepat di nilai float32 hasil standardisasi, sehingga membulatkan nilai mentah ke float32
+# sebelum standardisasi bisa membalik split (selisih hingga ~0.5 pada skala log untuk hour_sin).
+COMPACT_DTYPES = {
+    'day': np.int8, 'dayofyear': np.int16,
+    'season': np.int8, 'holiday': np.int8, 'workingday': np.int8, 'weather': np.int8,
+    'hour_val': np.int8, 'month_val': np.int8, 'weekday_val': np.int8,
+    'year_cat': np.int16, # tahun sebagai bilangan bulat, bukan string (lihat compiled_predictor._lookup_output_cols)
+}
+
+def to_wall_clock_datetime64(datetime_values):
+    """
+    Array datetime64[s] berisi jam dinding lokal. Zona waktu dibuang tanpa konversi ke UTC, sama seperti
+    akses `.dt` pada kolom ber-zona (cast langsung NumPy akan menggeser jam ke UTC).
+    """
+    if isinstance(datetime_values, pd.Series) and getattr(datetime_values.dtype, 'tz', None) is not None:
+        datetime_values = datetime_values.dt.tz_localize(None)
+    elif isinstance(datetime_values, pd.DatetimeIndex) and datetime_values.tz is not None:
+        datetime_values = datetime_values.tz_localize(None)
+    values = np.asarray(datetime_values)
+    if values.dtype == object:
+        # Objek Timestamp/datetime (mungkin ber-zona campuran): buang zona per elemen
+        values = np.array([pd.Timestamp(v).tz_localize(None).to_datetime64() for v in values.reshape(-1)],
+                          dtype='datetime64[ns]').reshape(values.shape)
+    return values.astype('datetime64[s]')
+
+def split_datetime_array(datetime_values):
+    """
+    Memecah datetime menjadi (jam, bulan, hari-dalam-minggu, tanggal, tahun, hari-dalam-tahun) dengan aritmetika integer.
+
+    Melempar ValueError jika ada nilai kosong (NaT), karena tidak ada jam yang bisa dihitung darinya.
+    """
+    values = to_wall_clock_datetime64(datetime_values)
+    n_missing = int(np.isnat(values).sum())
+    if n_missing:
+        raise ValueError(f"Kolom 'datetime' berisi {n_missing} nilai kosong atau tidak valid (NaT).")
+    days = values.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    hour = ((values - days) // np.timedelta64(1, 'h')).astype(np.int32)
+    month = (months.astype(np.int64) % 12 + 1).astype(np.int32)
+    weekday = ((days.astype(np.int64) + 3) % 7).astype(np.int32) # 1970-01-01 adalah Kamis; Senin=0
+    day = ((days - months.astype('datetime64[D]')).astype(np.int64) + 1).astype(np.int32)
+    year = (years.astype(np.int64) + 1970).astype(np.int32)
+    dayofyear = ((days - years.astype('datetime64[D]')).astype(np.int64) + 1).astype(np.int32)
+    return hour, month, weekday, day, year, dayofyear
+
+def year_to_category(year):
+    """Tahun integer -> string kategori ('2011', '2012', ...) tanpa konversi str per baris."""
+    unique_years, inverse = np.unique(year, return_inverse=True)
+    return np.array([str(y) for y in unique_years], dtype=object)[inverse.reshape(-1)]
+
+def winsorization_ranks(n, limits):
+    """Peringkat (0-based, urutan naik) nilai batas bawah dan atas untuk n nilai, dengan aturan indeks scipy."""
+    low_limit, up_limit = limits
+    lowidx = int(low_limit * n) if low_limit else 0
+    upidx = n - int(n * up_limit) if up_limit else n
+    return lowidx, upidx - 1
+
+def winsorization_bounds_from_array(values, limits):
+    """Batas (bawah, atas) yang sama persis dengan hasil scipy.stats.mstats.winsorize pada array tanpa NaN."""
+    low_rank, up_rank = winsorization_ranks(len(values), limits)
+    partitioned = np.partition(values, sorted({low_rank, up_rank}))
+    return partitioned[low_rank].item(), partitioned[up_rank].item()
+
+# ===================================================================================
+# Batas Winsorizing Beku (artefak hasil fit pada data latih)
+# ===================================================================================
+# Saat inferensi, winsorizing berbasis kuantil batch membuat hasil bergantung pada baris
+# lain di batch yang sama. Batas dari data latih disimpan sekali, lalu diterapkan dengan np.clip.
+WINSORIZATION_BOUNDS_FILENAME = 'winsorization_bounds.json'
+
+def fit_winsorization_bounds(train_df, limits=None):
+    """Menghitung batas winsorizing dari DataFrame latih (kolom mentah) dengan aturan indeks yang sama seperti scipy."""
+    limits = WINSORIZE_LIMITS if limits is None else limits
+    bounds = {}
+    for column_name, column_limits in limits.items():
+        values = train_df[column_name].dropna().to_numpy()
+        lower, upper = winsorization_bounds_from_array(values, column_limits)
+        bounds[column_name] = {'lower': lower, 'upper': upper, 'limits': list(column_limits), 'n_rows': int(len(values))}
+    return bounds
+
+def save_winsorization_bounds(bounds, path=WINSORIZATION_BOUNDS_FILENAME):
+    with open(path, 'w') as file:
+        json.dump(bounds, file, indent=2)
+
+def validate_winsorization_bounds(bounds, source):
+    """Memastikan batas mencakup semua kolom WINSORIZE_LIMITS; `source` hanya untuk pesan error."""
+    missing_cols = set(WINSORIZE_LIMITS) - set(bounds)
+    if missing_cols:
+        raise ValueError(f"Artefak batas winsorizing '{source}' tidak lengkap. Kolom yang hilang: {missing_cols}")
+    return bounds
+
+def load_winsorization_bounds(path=WINSORIZATION_BOUNDS_FILENAME):
+    """Memuat artefak batas winsorizing; mengembalikan None jika file tidak ada."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return validate_winsorization_bounds(json.load(file), path)
+
+def winsorization_bounds_path_for(model_path):
+    """Path artefak batas winsorizing milik sebuah file model (di folder yang sama dengan pickle)."""
+    return os.path.join(os.path.dirname(os.path.abspath(model_path)), WINSORIZATION_BOUNDS_FILENAME)
+
+@functools.lru_cache(maxsize=1)
+def default_winsorization_bounds():
+    """
+    Batas cadangan untuk pemanggil tanpa batas per versi model (dimuat sekali per proses).
+
+    Prediktor dari model_loader.load_predictor membawa batas versinya sendiri (atribut winsorization_bounds).
+    """
+    bounds = load_winsorization_bounds(os.path.join(os.path.dirname(os.path.abspath(__file__)), WINSORIZATION_BOUNDS_FILENAME))
+    if bounds is None:
+        warnings.warn(f"Artefak '{WINSORIZATION_BOUNDS_FILENAME}' tidak ditemukan; humidity/windspeed tidak di-winsorize saat inferensi. "
+                      "Jalankan fit_winsorization_bounds.py pada data latih untuk membuatnya.")
+    return bounds
+
+def apply_winsorization_bounds(values, column_name, bounds):
+    """Clip vektor dengan batas beku; tanpa artefak (bounds=None) nilai dikembalikan apa adanya."""
+    if bounds is None:
+        return values
+    return np.clip(values, bounds[column_name]['lower'], bounds[column_name]['upper'])
+
+def featurize_columns(input_raw, winsorization_bounds=None, compact=False):
+    """
+    Membangun langsung 19 kolom EXPECTED_COLS_FOR_CT dari array NumPy dalam satu lintasan.
+
+    `input_raw` boleh berupa DataFrame atau mapping nama kolom -> array. Hasilnya berupa dict
+    array yang sama dengan preprocess_initial_features -> create_cyclical_features, tetapi tanpa
+    menyalin DataFrame berulang kali dan tanpa enam kali akses `.dt`. Winsorizing memakai batas
+    beku dari data latih (lihat fit_winsorization_bounds), sehingga hasil tiap baris tidak
+    bergantung pada baris lain di batch.
+
+    Dengan `compact=True` kolom memakai COMPACT_DTYPES (year_cat berupa tahun int16); hanya untuk
+    CompiledPredictor, bukan untuk ColumnTransformer yang mengharapkan string pada year_cat.
+    """
+    with stage_timer('winsorize'):
+        humidity = apply_winsorization_bounds(np.asarray(input_raw['humidity']), 'humidity', winsorization_bounds)
+        windspeed = apply_winsorization_bounds(np.asarray(input_raw['windspeed']), 'windspeed', winsorization_bounds)
+    with stage_timer('featurize'):
+        hour, month, weekday, day, year, dayofyear = split_datetime_array(input_raw['datetime'])
+        columns = {
+            'temp': np.asarray(input_raw['temp']),
+            'humidity': humidity,
+            'windspeed': windspeed,
+            'day': day,
+            'dayofyear': dayofyear,
+            'hour_sin': HOUR_SIN_LUT[hour],
+            'hour_cos': HOUR_COS_LUT[hour],
+            'month_sin': MONTH_SIN_LUT[month],
+            'month_cos': MONTH_COS_LUT[month],
+            'weekday_sin': WEEKDAY_SIN_LUT[weekday],
+            'weekday_cos': WEEKDAY_COS_LUT[weekday],
+            'season': np.asarray(input_raw['season']),
+            'holiday': np.asarray(input_raw['holiday']),
+            'workingday': np.asarray(input_raw['workingday']),
+            'weather': np.asarray(input_raw['weather']),
+            'hour_val': hour,
+            'month_val': month,
+            'weekday_val': weekday,
+            'year_cat': year if compact else year_to_category(year),
+        }
+        if compact:
+            columns = {name: _to_compact_dtype(values, COMPACT_DTYPES[name]) if name in COMPACT_DTYPES else values
+                       for name, values in columns.items()}
+    return columns
+
+def _to_compact_dtype(values, dtype):
+    """
+    Konversi ke tipe ringkas; kolom yang nilainya di luar rentang tipe, atau berisi pecahan/NaN (yang akan
+    terpotong menjadi kategori lain), tetap apa adanya.
+    """
+    values = np.asarray(values)
+    if np.issubdtype(dtype, np.integer) and values.size:
+        if not np.issubdtype(values.dtype, np.integer):
+            if not np.issubdtype(values.dtype, np.floating):
+                return values
+            if not (np.isfinite(values) & (values == np.round(values))).all():
+                return values
+        info = np.iinfo(dtype)
+        if values.min() < info.min or values.max() > info.max:
+            return values
+    return values.astype(dtype, copy=False)
+
+def featurize_fast(input_df_raw, winsorization_bounds=None):
+    """Seperti featurize_columns, dibungkus menjadi DataFrame satu kali (tanpa salinan) dengan indeks input."""
+    return pd.DataFrame(featurize_columns(input_df_raw, winsorization_bounds), index=input_df_raw.index, copy=False)
+
+def _check_raw_columns(input_raw):
+    missing_cols = [c for c in RAW_INPUT_COLS if c not in input_raw]
+    if missing_cols:
+        raise KeyError(f"Kolom mentah yang dibutuhkan untuk rekayasa fitur tidak ditemukan: {missing_cols}")
+
+def engineer_features(input_df_raw, winsorization_bounds=None):
+    """Rekayasa fitur untuk DataFrame mentah (satu atau banyak baris) yang siap dimasukkan ke pipeline."""
+    _check_raw_columns(input_df_raw.columns)
+    if winsorization_bounds is None:
+        winsorization_bounds = default_winsorization_bounds()
+    return featurize_fast(input_df_raw, winsorization_bounds)
+
+def engineer_feature_columns(input_raw, winsorization_bounds=None, compact=False):
+    """Seperti engineer_features, tetapi mengembalikan dict array (untuk jalur cepat compiled_predictor)."""
+    _check_raw_columns(input_raw.columns if isinstance(input_raw, pd.DataFrame) else input_raw)
+    if winsorization_bounds is None:
+        winsorization_bounds = default_winsorization_bounds()
+    return featurize_columns(input_raw, winsorization_bounds, compact=compact)
@@ -0,0 +1,367 @@
+"""
+Latih ulang model secara bertahap (out-of-core) dari file data latih besar, melanjutkan booster yang sudah ada.
+
+Data latih (CSV/Parquet berisi RAW_INPUT_COLS + kolom target 'count') dibaca per potongan baris dan
+dialirkan ke XGBoost lewat iterator external-memory (xgb.DataIter + ExtMemQuantileDMatrix): setiap
+potongan melewati rekayasa fitur yang sama dengan inferensi (preprocess_initial_features, fitur siklikal,
+winsorizing dengan batas beku), lalu scaling + one-hot dari ColumnTransformer pipeline yang sudah di-fit,
+dengan target log1p(count). Halaman data terkuantisasi disimpan di cache disk, jadi memori puncak tidak
+bergantung pada jumlah baris.
+
+Secara bawaan pohon baru ditambahkan ke booster pipeline yang ada (xgb.train(..., xgb_model=booster));
+`--from-scratch` melatih booster baru dengan parameter dan ruang fitur yang sama. ColumnTransformer
+tidak di-fit ulang: pohon lama hanya bermakna pada skala/kategori yang sama.
+
+Hasilnya versi baru di `model_versions/<versi>/` dengan tata letak yang sama seperti root repo
+(pickle, bundel cepat-muat, batas winsorizing) plus training_report.json berisi waktu dinding dan
+peak RSS proses. Batas winsorizing versi juga tersimpan di manifest bundelnya, jadi untuk merilis cukup
+salin pickle + bundel ke root; model_registry.py memuat keduanya otomatis sebagai satu versi.
+
+    python retrain_model.py data_baru.csv --rounds 100
+    python retrain_model.py 2011.parquet 2012.parquet --chunk-size 500000 --valid validasi.csv
+"""
+import argparse
+import copy
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import xgboost as xgb
+
+from batch_scoring import MODEL_FILENAME, load_pipeline
+from compiled_predictor import compile_pipeline
+from data_io import iter_input_chunks, peak_rss_mb
+from model_bundle import MODEL_BUNDLE_DIR, export_bundle, file_sha256
+from model_loader import model_winsorization_bounds
+from preprocessing import (RAW_INPUT_COLS, WINSORIZATION_BOUNDS_FILENAME, WINSORIZE_LIMITS, engineer_feature_columns,
+                           load_winsorization_bounds, save_winsorization_bounds, winsorization_ranks)
+
+TARGET_COLUMN = 'count'
+DEFAULT_ROUNDS = 100
+DEFAULT_CHUNK_ROWS = 200_000
+# Jumlah bin histogram untuk fit_bounds_streaming (memori tetap, tidak bergantung jumlah baris)
+BOUNDS_HISTOGRAM_BINS = 4096
+MODEL_VERSIONS_DIR = 'model_versions'
+TRAINING_REPORT_FILENAME = 'training_report.json'
+# Atribut XGBRegressor yang diteruskan ke xgb.train (nama sklearn -> nama parameter native)
+TRAINING_PARAM_NAMES = {
+    'objective': 'objective', 'max_depth': 'max_depth', 'max_leaves': 'max_leaves', 'max_bin': 'max_bin',
+    'grow_policy': 'grow_policy', 'learning_rate': 'eta', 'gamma': 'gamma', 'min_child_weight': 'min_child_weight',
+    'max_delta_step': 'max_delta_step', 'subsample': 'subsample', 'colsample_bytree': 'colsample_bytree',
+    'colsample_bylevel': 'colsample_bylevel', 'colsample_bynode': 'colsample_bynode', 'reg_alpha': 'alpha',
+    'reg_lambda': 'lambda', 'random_state': 'seed', 'n_jobs': 'nthread',
+}
+
+# ===================================================================================
+# Data Latih Bertahap
+# ===================================================================================
+def iter_training_chunks(train_files, chunk_size, target_column=TARGET_COLUMN):
+    """Menghasilkan DataFrame mentah per potongan dari beberapa file; target wajib ada, tidak kosong, dan >= 0."""
+    for path in train_files:
+        for chunk in iter_input_chunks(path, chunk_size):
+            if target_column not in chunk.columns:
+                raise ValueError(f"Kolom target '{target_column}' tidak ditemukan pada '{path}'.")
+            target = chunk[target_column].to_numpy(dtype=np.float64)
+            if np.isnan(target).any() or (target < 0).any():
+                raise ValueError(f"Kolom target '{target_column}' pada '{path}' berisi nilai kosong atau negatif.")
+            yield chunk
+
+def _iter_bounds_columns(train_files, chunk_size):
+    """Menghasilkan dict kolom WINSORIZE_LIMITS -> array float64 tanpa NaN, per potongan."""
+    for path in train_files:
+        for chunk in iter_input_chunks(path, chunk_size):
+            values = {}
+            for column_name in WINSORIZE_LIMITS:
+                column_values = chunk[column_name].to_numpy(dtype=np.float64)
+                values[column_name] = column_values[~np.isnan(column_values)]
+            yield values
+
+def _histogram_bins(values, edges):
+    # Nomor bin yang sama persis di lintasan histogram dan lintasan penyempurnaan
+    return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+
+def fit_bounds_streaming(train_files, chunk_size, n_bins=BOUNDS_HISTOGRAM_BINS):
+    """
+    Batas winsorizing dari seluruh data latih tanpa menahan semua nilai di memori.
+
+    Hasilnya sama persis dengan fit_winsorization_bounds (aturan indeks scipy), dihitung dalam tiga
+    lintasan baca: (1) jumlah nilai + min/maks, (2) histogram `n_bins` bin untuk menemukan bin yang
+    memuat peringkat batas bawah/atas, (3) hitungan nilai unik hanya di dalam bin tersebut.
+    Memori sebanding dengan `n_bins` + jumlah nilai unik di bin target, bukan jumlah baris.
+    """
+    counts = dict.fromkeys(WINSORIZE_LIMITS, 0)
+    minimums = dict.fromkeys(WINSORIZE_LIMITS, np.inf)
+    maximums = dict.fromkeys(WINSORIZE_LIMITS, -np.inf)
+    for values in _iter_bounds_columns(train_files, chunk_size):
+        for column_name, column_values in values.items():
+            if len(column_values):
+                counts[column_name] += len(column_values)
+                minimums[column_name] = min(minimums[column_name], column_values.min())
+                maximums[column_name] = max(maximums[column_name], column_values.max())
+    empty_cols = [c for c, n in counts.items() if n == 0]
+    if empty_cols:
+        raise ValueError(f"Data latih tidak berisi nilai untuk kolom winsorizing: {empty_cols}")
+
+    edges = {c: np.linspace(minimums[c], maximums[c], n_bins + 1) for c in WINSORIZE_LIMITS}
+    histograms = {c: np.zeros(n_bins, dtype=np.int64) for c in WINSORIZE_LIMITS}
+    for values in _iter_bounds_columns(train_files, chunk_size):
+        for column_name, column_values in values.items():
+            histograms[column_name] += np.bincount(_histogram_bins(column_values, edges[column_name]), minlength=n_bins)
+
+    # Peringkat batas -> (bin, peringkat di dalam bin)
+    targets = {}
+    for column_name, column_limits in WINSORIZE_LIMITS.items():
+        cumulative = np.cumsum(histograms[column_name])
+        targets[column_name] = []
+        for rank in winsorization_ranks(counts[column_name], column_limits):
+            bin_index = int(np.searchsorted(cumulative, rank, side='right'))
+            targets[column_name].append((bin_index, rank - int(cumulative[bin_index] - histograms[column_name][bin_index])))
+
+    bin_values = {c: {bin_index: {} for bin_index, _ in targets[c]} for c in WINSORIZE_LIMITS}
+    for values in _iter_bounds_columns(train_files, chunk_size):
+        for column_name, column_values in values.items():
+            bins = _histogram_bins(column_values, edges[column_name])
+            for bin_index, value_counts in bin_values[column_name].items():
+                unique, unique_counts = np.unique(column_values[bins == bin_index], return_counts=True)
+                for value, count in zip(unique.tolist(), unique_counts.tolist()):
+                    value_counts[value] = value_counts.get(value, 0) + count
+
+    bounds = {}
+    for column_name, column_limits in WINSORIZE_LIMITS.items():
+        found = []
+        for bin_index, rank_in_bin in targets[column_name]:
+            value_counts = bin_values[column_name][bin_index]
+            sorted_values = sorted(value_counts)
+            cumulative = np.cumsum([value_counts[v] for v in sorted_values])
+            found.append(sorted_values[int(np.searchsorted(cumulative, rank_in_bin, side='right'))])
+        bounds[column_name] = {'lower': found[0], 'upper': found[1], 'limits': list(column_limits),
+                               'n_rows': counts[column_name]}
+    return bounds
+
+class TrainingChunkIter(xgb.DataIter):
+    """
+    Iterator external-memory XGBoost: setiap panggilan `next` menyerahkan satu potongan matriks fitur
+    + label log1p. XGBoost membaca ulang iterator beberapa kali (sketsa kuantil, lalu halaman data).
+    """
+
+    def __init__(self, train_files, predictor, winsorization_bounds, chunk_size, cache_prefix,
+                 target_column=TARGET_COLUMN):
+        self.train_files = list(train_files)
+        self.predictor = predictor
+        self.winsorization_bounds = winsorization_bounds
+        self.chunk_size = chunk_size
+        self.target_column = target_column
+        self.n_rows = 0
+        self.n_chunks = 0
+        self.n_passes = 0
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_training_chunks(self.train_files, self.chunk_size, self.target_column)
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        features = engineer_feature_columns(chunk, self.winsorization_bounds)
+        # Salin: transform menulis ke buffer per-thread yang dipakai ulang di potongan berikutnya
+        matrix = self.predictor.transform(features).copy()
+        label = np.log1p(chunk[self.target_column].to_numpy(dtype=np.float64))
+        input_data(data=matrix, label=label)
+        if self.n_passes == 0:
+            self.n_rows += len(chunk)
+            self.n_chunks += 1
+        return True
+
+    def reset(self):
+        if self._chunks is not None:
+            self._chunks.close()
+            self._chunks = None
+            self.n_passes += 1
+
+# ===================================================================================
+# Pelatihan
+# ===================================================================================
+def training_params(regressor):
+    """Parameter native xgb.train dari atribut XGBRegressor; tree_method dipaksa 'hist' (syarat external memory)."""
+    params = {}
+    for sklearn_name, native_name in TRAINING_PARAM_NAMES.items():
+        value = getattr(regressor, sklearn_name, None)
+        if value is not None:
+            params[native_name] = value
+    params['tree_method'] = 'hist'
+    return params
+
+def evaluate_rmsle(predictors, valid_file, winsorization_bounds, chunk_size, target_column=TARGET_COLUMN):
+    """RMSE skala log (RMSLE) beberapa prediktor pada file validasi, dibaca bertahap. Mengembalikan dict nama -> nilai."""
+    squared_errors = dict.fromkeys(predictors, 0.0)
+    n_rows = 0
+    for chunk in iter_training_chunks([valid_file], chunk_size, target_column):
+        features = engineer_feature_columns(chunk, winsorization_bounds)
+        target_log = np.log1p(chunk[target_column].to_numpy(dtype=np.float64))
+        for name, predictor in predictors.items():
+            squared_errors[name] += float(np.sum((predictor.predict(features) - target_log) ** 2))
+        n_rows += len(chunk)
+    if n_rows == 0:
+        raise ValueError(f"File validasi '{valid_file}' kosong.")
+    return {name: float(np.sqrt(total / n_rows)) for name, total in squared_errors.items()}
+
+def _versioned_pipeline(pipeline_model, booster):
+    """Salinan pipeline dengan booster baru; ColumnTransformer yang sudah di-fit dipakai apa adanya."""
+    new_pipeline = copy.deepcopy(pipeline_model)
+    regressor = new_pipeline.steps[-1][1]
+    regressor._Booster = booster
+    regressor.n_estimators = booster.num_boosted_rounds()
+    return new_pipeline
+
+def retrain(train_files, model_path=MODEL_FILENAME, output_dir=MODEL_VERSIONS_DIR, version=None,
+            rounds=DEFAULT_ROUNDS, chunk_size=DEFAULT_CHUNK_ROWS, from_scratch=False, bounds_path=None,
+            refit_bounds=False, valid_file=None, target_column=TARGET_COLUMN):
+    """
+    Melatih `rounds` pohon dari file data latih yang dialirkan bertahap dan menulis versi model baru.
+
+    Mengembalikan dict laporan (juga disimpan sebagai training_report.json di direktori versi).
+    """
+    if rounds <= 0:
+        raise ValueError("rounds harus lebih besar dari 0.")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size harus lebih besar dari 0.")
+    version = version or datetime.now().strftime('v%Y%m%d-%H%M%S')
+    version_dir = os.path.join(output_dir, version)
+    if os.path.exists(version_dir):
+        raise FileExistsError(f"Versi '{version}' sudah ada di '{output_dir}'.")
+
+    start = time.perf_counter()
+    timings = {}
+    pipeline_model = load_pipeline(model_path)
+    predictor = compile_pipeline(pipeline_model)
+    params = training_params(pipeline_model.steps[-1][1])
+
+    stage_start = time.perf_counter()
+    if refit_bounds:
+        winsorization_bounds = None
+    elif bounds_path is not None:
+        # Path yang diminta eksplisit wajib ada; batas hanya dihitung ulang jika tidak ada path sama sekali
+        winsorization_bounds, bounds_source = load_winsorization_bounds(bounds_path), bounds_path
+        if winsorization_bounds is None:
+            raise FileNotFoundError(f"Artefak batas winsorizing '{bounds_path}' tidak ditemukan.")
+    else:
+        # Batas milik model dasar: manifest bundelnya, atau winsorization_bounds.json di samping pickle
+        base_bundle_dir = os.path.join(os.path.dirname(os.path.abspath(model_path)), os.path.basename(MODEL_BUNDLE_DIR))
+        winsorization_bounds, bounds_source = model_winsorization_bounds(model_path, base_bundle_dir), 'base_model'
+    if winsorization_bounds is None:
+        # Seperti notebook: batas dihitung dari data latih, lalu ikut disimpan bersama versi baru
+        winsorization_bounds = fit_bounds_streaming(train_files, chunk_size)
+        bounds_source = 'fit'
+    timings['winsorization_bounds'] = time.perf_counter() - stage_start
+
+    os.makedirs(output_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix='.retrain_', dir=output_dir)
+    try:
+        stage_start = time.perf_counter()
+        chunk_iter = TrainingChunkIter(train_files, predictor, winsorization_bounds, chunk_size,
+                                       cache_prefix=os.path.join(work_dir, 'cache'), target_column=target_column)
+        dtrain = xgb.ExtMemQuantileDMatrix(chunk_iter, missing=predictor.missing,
+                                           max_bin=params.get('max_bin', 256))
+        timings['build_dmatrix'] = time.perf_counter() - stage_start
+        if chunk_iter.n_rows == 0:
+            raise ValueError("Data latih kosong.")
+
+        stage_start = time.perf_counter()
+        base_booster = None if from_scratch else predictor.booster
+        booster = xgb.train(params, dtrain, num_boost_round=rounds, xgb_model=base_booster)
+        timings['train'] = time.perf_counter() - stage_start
+        del dtrain
+
+        stage_start = time.perf_counter()
+        new_pipeline = _versioned_pipeline(pipeline_model, booster)
+        staging_dir = os.path.join(work_dir, version)
+        os.makedirs(staging_dir)
+        new_model_path = os.path.join(staging_dir, os.path.basename(model_path))
+        with open(new_model_path, 'wb') as file:
+            pickle.dump(new_pipeline, file)
+        export_bundle(new_pipeline, os.path.join(staging_dir, os.path.basename(MODEL_BUNDLE_DIR)),
+                      source_model_path=new_model_path, winsorization_bounds=winsorization_bounds)
+        save_winsorization_bounds(winsorization_bounds, os.path.join(staging_dir, WINSORIZATION_BOUNDS_FILENAME))
+        timings['write_artifacts'] = time.perf_counter() - stage_start
+
+        metrics = None
+        if valid_file is not None:
+            stage_start = time.perf_counter()
+            metrics = evaluate_rmsle({'base': predictor, 'new': compile_pipeline(new_pipeline)}, valid_file,
+                                     winsorization_bounds, chunk_size, target_column)
+            timings['validate'] = time.perf_counter() - stage_start
+
+        report = {
+            'version': version,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'base_model': os.path.abspath(model_path),
+            'base_model_sha256': file_sha256(model_path),
+            'model_sha256': file_sha256(new_model_path),
+            'mode': 'from_scratch' if from_scratch else 'continue',
+            'train_files': [os.path.abspath(p) for p in train_files],
+            'target_column': target_column,
+            'rows': chunk_iter.n_rows,
+            'chunks': chunk_iter.n_chunks,
+            'chunk_size': chunk_size,
+            'data_passes': chunk_iter.n_passes,
+            'rounds_added': rounds,
+            'total_rounds': booster.num_boosted_rounds(),
+            'params': params,
+            'winsorization_bounds_source': bounds_source,
+            'valid_file': os.path.abspath(valid_file) if valid_file else None,
+            'valid_rmsle': metrics,
+            'stage_seconds': timings,
+            'wall_seconds': time.perf_counter() - start,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        with open(os.path.join(staging_dir, TRAINING_REPORT_FILENAME), 'w') as file:
+            json.dump(report, file, indent=2)
+        # Direktori versi baru muncul utuh atau tidak sama sekali
+        os.replace(staging_dir, version_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    report['version_dir'] = version_dir
+    return report
+
+# ===================================================================================
+# Entry Point CLI
+# ===================================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latih ulang model secara bertahap (external memory) dan simpan sebagai versi baru.")
+    parser.add_argument('train_files', nargs='+',
+                        help=f"File data latih (.csv atau .parquet) berisi kolom: {', '.join(RAW_INPUT_COLS)}, {TARGET_COLUMN}")
+    parser.add_argument('--model', default=MODEL_FILENAME, help="Path file model pickle yang dilanjutkan")
+    parser.add_argument('--output-dir', default=MODEL_VERSIONS_DIR, help="Direktori induk versi model")
+    parser.add_argument('--version', default=None, help="Nama versi (bawaan: stempel waktu vYYYYmmdd-HHMMSS)")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="Jumlah pohon baru")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_ROWS, help="Jumlah baris per potongan baca")
+    parser.add_argument('--from-scratch', action='store_true', help="Latih booster baru alih-alih melanjutkan booster yang ada")
+    parser.add_argument('--target', default=TARGET_COLUMN, help="Nama kolom target (jumlah sewa)")
+    parser.add_argument('--bounds', default=None,
+                        help="Artefak batas winsorizing (harus ada). Bawaan: batas milik model dasar; jika model dasar "
+                             "tidak punya batas, batas dihitung dari data latih")
+    parser.add_argument('--refit-bounds', action='store_true', help="Selalu hitung ulang batas winsorizing dari data latih")
+    parser.add_argument('--valid', default=None, help="File validasi untuk membandingkan RMSLE model lama dan baru")
+    args = parser.parse_args(argv)
+
+    report = retrain(args.train_files, model_path=args.model, output_dir=args.output_dir, version=args.version,
+                     rounds=args.rounds, chunk_size=args.chunk_size, from_scratch=args.from_scratch,
+                     bounds_path=args.bounds, refit_bounds=args.refit_bounds, valid_file=args.valid,
+                     target_column=args.target)
+    peak = f"{report['peak_rss_mb']:.0f} MB" if report['peak_rss_mb'] is not None else "tidak tersedia"
+    print(f"{report['rows']} baris ({report['chunks']} potongan) -> {report['rounds_added']} pohon baru "
+          f"(total {report['total_rounds']}) dalam {report['wall_seconds']:.2f} detik, peak RSS {peak}.")
+    if report['valid_rmsle'] is not None:
+        print(f"RMSLE validasi: lama {report['valid_rmsle']['base']:.4f}, baru {report['valid_rmsle']['new']:.4f}")
+    print(f"Versi baru disimpan ke: {report['version_dir']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Layanan inferensi HTTP (ASGI) tanpa UI, berdampingan dengan aplikasi Streamlit.
+
+Setiap worker memuat pipeline sekali di thread latar belakang saat startup (bundel cepat-muat atau
+pickle terkompilasi, lihat model_loader.py); selama pemuatan server sudah menerima permintaan dan
+/health serta /predict menjawab 503. Panggilan predict yang berat CPU dijalankan di thread pool
+terbatas agar event loop tetap responsif saat banyak permintaan bersamaan.
+
+    uvicorn service:app --host 0.0.0.0 --port 8000 --workers 4
+
+Endpoint:
+    GET  /health   status model (503 jika model belum/gagal dimuat)
+    POST /predict  satu record JSON, atau {"records": [...]} untuk batch
+    GET  /metrics  histogram latensi per tahap (format teks Prometheus, lihat stage_metrics.py)
+"""
+import asyncio
+import contextlib
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Literal, Union
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from inference import build_raw_input_frame, demand_level, log_to_counts, predict_log
+from model_bundle import MODEL_BUNDLE_DIR, MODEL_FILENAME
+from model_loader import BackgroundLoader, limit_predictor_threads, load_predictor, warm_up_predictor
+from stage_metrics import REGISTRY
+
+MODEL_PATH = os.environ.get('MODEL_PATH', MODEL_FILENAME)
+MODEL_BUNDLE_PATH = os.environ.get('MODEL_BUNDLE_DIR', MODEL_BUNDLE_DIR)
+# Jumlah thread untuk predict per worker dan batas baris per permintaan batch
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', os.cpu_count() or 1))
+# Thread XGBoost per panggilan predict; total thread = INFERENCE_THREADS x BOOSTER_THREADS (bawaan: sebanyak core)
+BOOSTER_THREADS = int(os.environ.get('BOOSTER_THREADS', max(1, (os.cpu_count() or 1) // INFERENCE_THREADS)))
+MAX_BATCH_ROWS = int(os.environ.get('MAX_BATCH_ROWS', 100_000))
+
+# ===================================================================================
+# Skema Permintaan/Respons
+# ===================================================================================
+class HourlyRecord(BaseModel):
+    datetime: datetime.datetime
+    season: Literal[1, 2, 3, 4]
+    holiday: Literal[0, 1]
+    workingday: Literal[0, 1]
+    weather: Literal[1, 2, 3, 4]
+    temp: float
+    humidity: float = Field(ge=0, le=100)
+    windspeed: float = Field(ge=0)
+
+class BatchRequest(BaseModel):
+    records: List[HourlyRecord] = Field(min_length=1)
+
+class Prediction(BaseModel):
+    prediction: int
+    level: str
+
+class BatchPrediction(BaseModel):
+    predictions: List[int]
+    count: int
+
+# ===================================================================================
+# Aplikasi
+# ===================================================================================
+_state = {'loader': None, 'executor': None}
+
+def _load_model():
+    try:
+        return warm_up_predictor(limit_predictor_threads(load_predictor(MODEL_PATH, MODEL_BUNDLE_PATH), BOOSTER_THREADS))
+    except Exception as e:
+        print(f"Gagal memuat model: {type(e).__name__}: {e}")
+        raise
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Pemuatan tidak ditunggu: worker langsung menerima permintaan dan melaporkan kesiapan lewat /health
+    _state['loader'] = BackgroundLoader('prediktor', _load_model).start()
+    executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+    _state['executor'] = executor
+    yield
+    executor.shutdown(wait=True)
+    _state.update(loader=None, executor=None)
+
+app = FastAPI(title="Prediksi Sewa Sepeda COGNIDATA", lifespan=lifespan)
+
+def _ready_predictor():
+    """Prediktor yang sudah dimuat; HTTP 503 selama pemuatan atau jika pemuatan gagal (worker tetap hidup)."""
+    loader = _state['loader']
+    if loader is None or not loader.is_ready():
+        raise HTTPException(status_code=503, detail="Model sedang dimuat.")
+    try:
+        return loader.wait(0)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"{type(e).__name__}: {e}")
+
+def _predict_records(predictor, records):
+    input_df_raw = build_raw_input_frame([record.model_dump() for record in records])
+    return log_to_counts(predict_log(predictor, input_df_raw))
+
+@app.get('/health')
+async def health():
+    _ready_predictor()
+    return {'status': 'ok', 'model': MODEL_PATH, 'inference_threads': INFERENCE_THREADS, 'booster_threads': BOOSTER_THREADS}
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+@app.post('/predict', response_model=Union[Prediction, BatchPrediction])
+async def predict(body: Union[BatchRequest, HourlyRecord]):
+    predictor = _ready_predictor()
+    records = body.records if isinstance(body, BatchRequest) else [body]
+    if len(records) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Maksimum {MAX_BATCH_ROWS} record per permintaan.")
+
+    counts = await asyncio.get_running_loop().run_in_executor(_state['executor'], _predict_records, predictor, records)
+    if isinstance(body, BatchRequest):
+        return BatchPrediction(predictions=counts.tolist(), count=len(counts))
+    return Prediction(prediction=int(counts[0]), level=demand_level(int(counts[0])))
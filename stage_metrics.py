@@ -0,0 +1,154 @@
+"""
+Instrumentasi latensi per tahap inferensi: histogram dalam proses + ekspor teks Prometheus.
+
+Tahap yang diukur (lihat pemanggil stage_timer):
+    load_model, warm_up, load_pipeline          pemuatan model (model_loader.py)
+    build_dataframe                             input mentah -> DataFrame (inference.py)
+    featurize, winsorize                        rekayasa fitur (preprocessing.py)
+    column_transform, booster                   ColumnTransformer/jalur terkompilasi dan pohon XGBoost
+    expm1                                       skala log -> jumlah sewa
+    explain                                     kontribusi fitur pred_contribs (explanations.py)
+
+Aktif secara bawaan; set STAGE_METRICS=0 untuk mematikan. Saat mati, stage_timer mengembalikan
+context manager kosong yang sama sehingga biayanya hanya satu pemanggilan fungsi.
+Untuk proses Streamlit, set METRICS_PORT agar endpoint /metrics lokal dijalankan.
+"""
+import bisect
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_NAME = 'bike_inference_stage_seconds'
+# Batas atas bucket (detik), dari 50 mikrodetik hingga 10 detik
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class StageHistograms:
+    """Histogram per tahap (bucket tetap) yang thread-safe."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._sums = {}
+
+    def observe(self, stage, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._counts.get(stage)
+            if counts is None:
+                counts = self._counts[stage] = [0] * (len(self.buckets) + 1)
+                self._sums[stage] = 0.0
+            counts[index] += 1
+            self._sums[stage] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: (list(counts), self._sums[stage]) for stage, counts in self._counts.items()}
+
+    def quantile(self, counts, q):
+        """Perkiraan kuantil dari bucket (interpolasi linear seperti histogram_quantile Prometheus)."""
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count > 0:
+                if index == len(self.buckets): # Bucket +Inf: kembalikan batas terbesar yang diketahui
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def summary(self):
+        """Ringkasan per tahap untuk panel diagnostik: jumlah, rata-rata, dan perkiraan p50/p95 (ms)."""
+        rows = []
+        for stage, (counts, total_seconds) in sorted(self.snapshot().items()):
+            n = sum(counts)
+            rows.append({
+                'tahap': stage,
+                'jumlah': n,
+                'rata_rata_ms': total_seconds / n * 1e3 if n else 0.0,
+                'p50_ms': self.quantile(counts, 0.50) * 1e3,
+                'p95_ms': self.quantile(counts, 0.95) * 1e3,
+                'total_s': total_seconds,
+            })
+        return rows
+
+    def render_prometheus(self):
+        """Format teks eksposisi Prometheus (histogram kumulatif per tahap)."""
+        lines = [f"# HELP {METRIC_NAME} Latensi per tahap inferensi prediksi sewa sepeda.",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        for stage, (counts, total_seconds) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for upper, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if upper == float('inf') else repr(upper)
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total_seconds!r}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+REGISTRY = StageHistograms()
+_enabled = os.environ.get('STAGE_METRICS', '1') != '0'
+_NULL_TIMER = contextlib.nullcontext()
+
+class _StageTimer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REGISTRY.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+def stage_timer(stage):
+    """Context manager pengukur satu tahap; no-op (objek bersama) jika instrumentasi dimatikan."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _StageTimer(stage)
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+def is_enabled():
+    return _enabled
+
+# ===================================================================================
+# Endpoint /metrics lokal (untuk proses tanpa server HTTP sendiri, misal Streamlit)
+# ===================================================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # Jangan membanjiri log aplikasi
+        pass
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Menjalankan server /metrics di thread daemon; mengembalikan objek server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='stage-metrics-server', daemon=True).start()
+    return server
@@ -0,0 +1,174 @@
+"""
+Skoring streaming: membaca record JSONL tanpa henti (stdin atau file), mengelompokkan menjadi
+micro-batch, lalu langsung menulis prediksi sebagai JSONL.
+
+Micro-batch dikirim saat mencapai `--batch-size` record ATAU saat record tertua sudah menunggu
+`--max-wait-ms`, mana yang lebih dulu. Pembacaan berjalan di thread terpisah dengan antrean
+berbatas, sehingga memori tetap datar berapa pun panjang stream-nya.
+
+    tail -f cuaca.jsonl | python stream_scoring.py --batch-size 256 --max-wait-ms 200
+    python stream_scoring.py input.jsonl --output hasil.jsonl
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+
+from batch_scoring import MODEL_FILENAME, PREDICTION_COLUMN
+from inference import build_raw_input_frame, log_to_counts, predict_log
+from model_bundle import MODEL_BUNDLE_DIR
+from preprocessing import RAW_INPUT_COLS
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_SECONDS = 0.2
+ERROR_FIELD = 'error'
+_END_OF_STREAM = object()
+
+# ===================================================================================
+# Baca Record
+# ===================================================================================
+def iter_jsonl_records(stream):
+    """Menghasilkan satu dict per baris JSONL; baris kosong dilewati, baris rusak menjadi record error."""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {ERROR_FIELD: f"JSON tidak valid pada baris {line_number}: {e}"}
+            continue
+        if not isinstance(record, dict):
+            yield {ERROR_FIELD: f"Baris {line_number} bukan objek JSON."}
+            continue
+        yield record
+
+def micro_batches(records, batch_size=DEFAULT_BATCH_SIZE, max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS):
+    """
+    Mengelompokkan iterator record menjadi list berukuran <= `batch_size`.
+
+    Iterator dibaca di thread daemon ke antrean berbatas; batch dikirim saat penuh atau saat record
+    pertamanya sudah menunggu `max_wait_seconds`, sehingga stream yang lambat tetap mendapat
+    prediksi tepat waktu.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size harus lebih besar dari 0.")
+    pending = queue.Queue(maxsize=batch_size * 2)
+
+    def read():
+        try:
+            for record in records:
+                pending.put(record)
+        finally:
+            pending.put(_END_OF_STREAM)
+
+    threading.Thread(target=read, name='stream-reader', daemon=True).start()
+    batch = []
+    deadline = None
+    while True:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            item = pending.get(timeout=timeout)
+        except queue.Empty:
+            item = None
+        if item is _END_OF_STREAM:
+            if batch:
+                yield batch
+            return
+        if item is not None:
+            if not batch:
+                deadline = time.monotonic() + max_wait_seconds
+            batch.append(item)
+        if batch and (len(batch) >= batch_size or time.monotonic() >= deadline):
+            yield batch
+            batch = []
+            deadline = None
+
+# ===================================================================================
+# Skoring
+# ===================================================================================
+def _predict_batch(pipeline_model, records):
+    return log_to_counts(predict_log(pipeline_model, build_raw_input_frame(records)))
+
+def _check_record(record):
+    """Record tanpa kolom wajib ditandai error (di DataFrame batch kolom itu akan terisi NaN diam-diam)."""
+    if ERROR_FIELD in record:
+        return record
+    missing_cols = [c for c in RAW_INPUT_COLS if record.get(c) is None]
+    if missing_cols:
+        return {**record, ERROR_FIELD: f"Kolom wajib tidak ditemukan pada input: {missing_cols}"}
+    return record
+
+def score_batch(pipeline_model, records):
+    """
+    Mengembalikan list record keluaran (record input + `prediksi_jumlah_sewa`) dalam urutan yang sama.
+
+    Jika satu batch gagal (misal ada tanggal yang tidak bisa di-parse), record diprediksi satu per satu agar
+    hanya record yang rusak yang mendapat kolom `error`.
+    """
+    records = [_check_record(r) for r in records]
+    valid = [r for r in records if ERROR_FIELD not in r]
+    try:
+        predictions = iter(_predict_batch(pipeline_model, valid).tolist()) if valid else iter(())
+        return [r if ERROR_FIELD in r else {**r, PREDICTION_COLUMN: next(predictions)} for r in records]
+    except (ValueError, TypeError, KeyError):
+        pass
+    results = []
+    for record in records:
+        if ERROR_FIELD in record:
+            results.append(record)
+            continue
+        try:
+            results.append({**record, PREDICTION_COLUMN: int(_predict_batch(pipeline_model, [record])[0])})
+        except (ValueError, TypeError, KeyError) as e:
+            results.append({**record, ERROR_FIELD: f"{type(e).__name__}: {e}"})
+    return results
+
+def score_stream(pipeline_model, records, batch_size=DEFAULT_BATCH_SIZE, max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS):
+    """Generator: menghasilkan list record keluaran per micro-batch, segera setelah batch diprediksi."""
+    for batch in micro_batches(records, batch_size=batch_size, max_wait_seconds=max_wait_seconds):
+        yield score_batch(pipeline_model, batch)
+
+# ===================================================================================
+# Entry Point CLI
+# ===================================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Skoring streaming record JSONL (stdin atau file) dengan micro-batch.")
+    parser.add_argument('input', nargs='?', default='-', help="File JSONL berisi kolom: " + ", ".join(RAW_INPUT_COLS) + " ('-' = stdin)")
+    parser.add_argument('--output', default='-', help="File JSONL output ('-' = stdout)")
+    parser.add_argument('--model', default=MODEL_FILENAME, help="Path file model pickle")
+    parser.add_argument('--bundle-dir', default=MODEL_BUNDLE_DIR, help="Direktori bundel cepat-muat (dipakai jika cocok dengan pickle)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Maksimum record per micro-batch")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_SECONDS * 1e3,
+                        help="Batas waktu tunggu record pertama sebelum batch dikirim (ms)")
+    args = parser.parse_args(argv)
+
+    from model_loader import load_predictor, warm_up_predictor
+    # Pesan pemuatan model ke stderr agar stdout hanya berisi JSONL
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        pipeline_model = warm_up_predictor(load_predictor(args.model, args.bundle_dir))
+    finally:
+        sys.stdout = stdout
+
+    input_stream = sys.stdin if args.input == '-' else open(args.input)
+    output_stream = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for results in score_stream(pipeline_model, iter_jsonl_records(input_stream),
+                                    batch_size=args.batch_size, max_wait_seconds=args.max_wait_ms / 1e3):
+            output_stream.writelines(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in results)
+            output_stream.flush()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+"""
+Pembangkit data mentah sintetis (skema sama dengan input aplikasi) untuk benchmark dan uji kesetaraan.
+"""
+import numpy as np
+import pandas as pd
+
+def generate_synthetic_raw_frame(n_rows, seed=0, start='2011-01-01', n_hours=2 * 365 * 24):
+    """Membuat DataFrame mentah acak berisi kolom RAW_INPUT_COLS (+ 'atemp') dengan rentang nilai yang masuk akal."""
+    rng = np.random.default_rng(seed)
+    temp = np.round(rng.uniform(0.0, 41.0, n_rows), 1)
+    return pd.DataFrame({
+        'datetime': pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, n_hours, n_rows), unit='h'),
+        'season': rng.integers(1, 5, n_rows),
+        'holiday': rng.integers(0, 2, n_rows),
+        'workingday': rng.integers(0, 2, n_rows),
+        'weather': rng.integers(1, 5, n_rows),
+        'temp': temp,
+        'atemp': temp,
+        'humidity': rng.integers(0, 101, n_rows),
+        'windspeed': np.round(rng.uniform(0.0, 57.0, n_rows), 1),
+    })
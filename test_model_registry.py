@@ -0,0 +1,58 @@
+"""
+Uji model_registry: pemantau tidak boleh membatalkan rollback atau discard_candidate.
+
+    python -m pytest -q test_model_registry.py
+"""
+import os
+import shutil
+import time
+
+import pytest
+
+from model_bundle import MODEL_BUNDLE_DIR, MODEL_FILENAME
+from model_registry import ModelRegistry
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture
+def artifacts(tmp_path):
+    model_path = str(tmp_path / MODEL_FILENAME)
+    bundle_dir = str(tmp_path / MODEL_BUNDLE_DIR)
+    shutil.copy(os.path.join(REPO_DIR, MODEL_FILENAME), model_path)
+    shutil.copytree(os.path.join(REPO_DIR, MODEL_BUNDLE_DIR), bundle_dir)
+    return model_path, bundle_dir
+
+def _replace_artifact(model_path):
+    """Meniru rilis artefak baru: sidik jari (mtime) pickle berubah."""
+    time.sleep(0.01)
+    stat = os.stat(model_path)
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+def _registry(artifacts, shadow=False):
+    registry = ModelRegistry(*artifacts, poll_seconds=0, shadow=shadow, warm_up=False).start()
+    registry.wait()
+    return registry
+
+def test_rollback_survives_later_checks(artifacts):
+    registry = _registry(artifacts)
+    _replace_artifact(artifacts[0])
+    assert registry.check_for_update(require_stable=False).number == 2
+
+    assert registry.rollback().number == 1
+    assert registry.check_for_update() is None
+    assert registry.check_for_update(require_stable=False) is None
+    assert registry.live.number == 1
+
+    _replace_artifact(artifacts[0])
+    registry.check_for_update()
+    assert registry.check_for_update().number == 3
+
+def test_discarded_candidate_is_not_readopted(artifacts):
+    registry = _registry(artifacts, shadow=True)
+    _replace_artifact(artifacts[0])
+    assert registry.check_for_update(require_stable=False).number == 2
+
+    registry.discard_candidate()
+    assert registry.check_for_update(require_stable=False) is None
+    assert registry.candidate is None
+    assert registry.live.number == 1
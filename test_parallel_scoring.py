@@ -0,0 +1,59 @@
+"""
+Uji parallel_scoring untuk input CSV yang tipe kolomnya berbeda antar potongan.
+
+    python -m pytest -q test_parallel_scoring.py
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import MODEL_FILENAME, PREDICTION_COLUMN, load_pipeline, score_frame
+from compiled_predictor import compile_or_fallback
+from data_io import read_input_table
+from parallel_scoring import score_file_parallel
+from synthetic_data import generate_synthetic_raw_frame
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CHUNK_ROWS = 100
+
+def _write_mixed_dtype_csv(path, later_chunks):
+    """Potongan pertama berisi kolom bilangan bulat; `later_chunks(df)` mengubah baris sisanya."""
+    df = generate_synthetic_raw_frame(3 * CHUNK_ROWS, seed=1)
+    df['humidity'] = df['humidity'].round().astype(np.int64)
+    df['nomor_catatan'] = np.arange(len(df))
+    with open(path, 'w', newline='') as file:
+        df.iloc[:CHUNK_ROWS].to_csv(file, index=False)
+        later_chunks(df.iloc[CHUNK_ROWS:].copy()).to_csv(file, index=False, header=False)
+
+def _float_chunks(df):
+    df['humidity'] = df['humidity'] + 0.5
+    df['workingday'] = df['workingday'].astype(np.float64)
+    df.loc[df.index[5], 'weather'] = np.nan
+    return df
+
+def test_parquet_output_with_mixed_dtype_chunks(tmp_path):
+    input_path = str(tmp_path / 'campuran.csv')
+    output_path = str(tmp_path / 'hasil.parquet')
+    _write_mixed_dtype_csv(input_path, _float_chunks)
+
+    stats = score_file_parallel(input_path, output_path, model_path=os.path.join(REPO_DIR, MODEL_FILENAME),
+                                workers=1, chunk_size=CHUNK_ROWS)
+
+    assert stats['rows'] == 3 * CHUNK_ROWS
+    expected, _ = score_frame(compile_or_fallback(load_pipeline(os.path.join(REPO_DIR, MODEL_FILENAME))),
+                              read_input_table(input_path))
+    result = pd.read_parquet(output_path)
+    np.testing.assert_array_equal(result[PREDICTION_COLUMN].to_numpy(), expected[PREDICTION_COLUMN].to_numpy())
+    np.testing.assert_array_equal(result['nomor_catatan'].to_numpy(), np.arange(3 * CHUNK_ROWS))
+
+def test_parquet_output_rejects_lossy_column_cast(tmp_path):
+    input_path = str(tmp_path / 'campuran.csv')
+    output_path = str(tmp_path / 'hasil.parquet')
+    _write_mixed_dtype_csv(input_path, lambda df: df.assign(nomor_catatan=df['nomor_catatan'] + 0.25))
+
+    with pytest.raises(ValueError, match='tidak cocok dengan shard pertama'):
+        score_file_parallel(input_path, output_path, model_path=os.path.join(REPO_DIR, MODEL_FILENAME),
+                            workers=1, chunk_size=CHUNK_ROWS)
+    assert not os.path.exists(output_path)